@@ -0,0 +1,12 @@
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS
+
+PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def is_shared_cache(alias=DEFAULT_CACHE_ALIAS):
+    # Entries in a process-local cache are invisible to the other workers.
+    return settings.CACHES[alias]['BACKEND'] not in PROCESS_LOCAL_BACKENDS
@@ -0,0 +1,172 @@
+import json
+import logging
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('Main.instrumentation')
+
+_request_metrics = ContextVar('request_metrics', default=None)
+_route_samples = defaultdict(lambda: deque(maxlen=getattr(settings, 'INSTRUMENTATION_SAMPLE_SIZE', 500)))
+_route_lock = threading.Lock()
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.queries = 0
+        self.sql_ms = 0.0
+        self.statements = Counter()
+        self.spans = defaultdict(float)
+        self.active = set()
+
+    def record_query(self, sql, duration_ms):
+        self.queries += 1
+        self.sql_ms += duration_ms
+        self.statements[sql] += 1
+
+    def duplicates(self):
+        threshold = getattr(settings, 'INSTRUMENTATION_DUPLICATE_THRESHOLD', 5)
+        return [{'sql': sql[:200], 'count': count}
+                for sql, count in self.statements.most_common() if count >= threshold]
+
+
+def _record_query(execute, sql, params, many, context):
+    metrics = _request_metrics.get()
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        if metrics is not None:
+            # sql still holds placeholders, so repeated shapes with different params collapse together.
+            metrics.record_query(sql, (time.perf_counter() - start) * 1000)
+
+
+@contextmanager
+def span(name):
+    metrics = _request_metrics.get()
+    if metrics is None or name in metrics.active:
+        yield
+        return
+    metrics.active.add(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.spans[name] += (time.perf_counter() - start) * 1000
+        metrics.active.discard(name)
+
+
+class InstrumentedSerializerMixin:
+    def to_representation(self, instance):
+        with span('serializer'):
+            return super().to_representation(instance)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def query_budget(limit=None, **methods):
+    # Works on function views and APIView classes; as_view() exposes the class as view_class.
+    def decorate(view):
+        view.query_budget = {'*': limit, **methods}
+        return view
+    return decorate
+
+
+def view_budget(view, method):
+    budgets = getattr(view, 'query_budget', None)
+    if budgets is None:
+        budgets = getattr(getattr(view, 'view_class', None), 'query_budget', None)
+    if budgets is None:
+        return None
+    return budgets.get(method.lower(), budgets.get('*'))
+
+
+def _percentile(values, fraction):
+    index = min(int(round(fraction * (len(values) - 1))), len(values) - 1)
+    return values[index]
+
+
+def route_percentiles():
+    with _route_lock:
+        samples = {route: list(values) for route, values in _route_samples.items()}
+
+    report = {}
+    for route, values in sorted(samples.items()):
+        durations = sorted(duration for duration, _ in values)
+        queries = sorted(count for _, count in values)
+        report[route] = {
+            'samples': len(values),
+            'p50_ms': _percentile(durations, 0.5),
+            'p90_ms': _percentile(durations, 0.9),
+            'p99_ms': _percentile(durations, 0.99),
+            'p50_queries': _percentile(queries, 0.5),
+            'p99_queries': _percentile(queries, 0.99),
+        }
+    return report
+
+
+class RequestInstrumentationMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = _request_metrics.set(metrics)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(_record_query))
+                response = self.get_response(request)
+        finally:
+            _request_metrics.reset(token)
+        total_ms = (time.perf_counter() - start) * 1000
+
+        match = getattr(request, 'resolver_match', None)
+        route = f'{request.method} /{match.route}' if match else f'{request.method} <unresolved>'
+        duplicates = metrics.duplicates()
+        budget = view_budget(match.func, request.method) if match else None
+        over_budget = budget is not None and metrics.queries > budget
+
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={metrics.sql_ms:.1f};desc="{metrics.queries} queries"',
+            f'serializer;dur={metrics.spans["serializer"]:.1f}',
+            f'render;dur={metrics.spans["render"]:.1f}',
+            f'total;dur={total_ms:.1f}',
+        ])
+        with _route_lock:
+            _route_samples[route].append((round(total_ms, 1), metrics.queries))
+
+        logger.log(logging.WARNING if duplicates or over_budget else logging.INFO, json.dumps({
+            'route': route,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round(total_ms, 1),
+            'queries': metrics.queries,
+            'sql_ms': round(metrics.sql_ms, 1),
+            'serializer_ms': round(metrics.spans['serializer'], 1),
+            'render_ms': round(metrics.spans['render'], 1),
+            'query_budget': budget,
+            'duplicate_queries': duplicates,
+        }))
+        if over_budget and getattr(settings, 'QUERY_BUDGET_ENFORCE', False):
+            raise QueryBudgetExceeded(f'{route} ran {metrics.queries} queries, budget is {budget}: '
+                                      f'{[query["sql"] for query in duplicates] or list(metrics.statements)}')
+        return response
+
+    def process_template_response(self, request, response):
+        # Both DRF Responses and TemplateResponses render lazily after this hook.
+        render = response.render
+
+        def timed_render():
+            with span('render'):
+                return render()
+
+        response.render = timed_render
+        return response
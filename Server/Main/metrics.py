@@ -0,0 +1,48 @@
+from django.db import connections
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from authCustom.user_cache import user_cache_stats
+from .instrumentation import route_percentiles
+
+
+def pool_metrics(connection):
+    pool = getattr(connection, 'pool', None)
+    if pool is None:
+        return {'pooled': False, 'conn_max_age': connection.settings_dict.get('CONN_MAX_AGE')}
+
+    stats = pool.get_stats()
+    requests = stats.get('requests_num', 0)
+    return {
+        'pooled': True,
+        'min_size': stats.get('pool_min'),
+        'max_size': stats.get('pool_max'),
+        'size': stats.get('pool_size', 0),
+        'in_use': stats.get('pool_size', 0) - stats.get('pool_available', 0),
+        'available': stats.get('pool_available', 0),
+        'waiting': stats.get('requests_waiting', 0),
+        'checkouts': requests,
+        'waits': stats.get('requests_queued', 0),
+        'timeouts': stats.get('requests_errors', 0),
+        'avg_checkout_ms': stats.get('requests_wait_ms', 0) / requests if requests else 0,
+        'connections_opened': stats.get('connections_num', 0),
+        'avg_connect_ms': stats.get('connections_ms', 0) / stats['connections_num'] if stats.get('connections_num') else 0,
+        'connections_lost': stats.get('connections_lost', 0),
+    }
+
+
+class MetricsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        data = {'database': {alias: pool_metrics(connections[alias]) for alias in connections},
+                'user_cache': user_cache_stats()}
+        return Response({'success': True, 'data': data}, status=status.HTTP_200_OK)
+
+
+class RouteTimingsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response({'success': True, 'data': route_percentiles()}, status=status.HTTP_200_OK)
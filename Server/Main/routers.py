@@ -0,0 +1,111 @@
+import random
+import threading
+import time
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_COOKIE = 'db_pin'
+
+# A dict per request so writes made in sync_to_async threads are seen by the middleware.
+_request_state = ContextVar('replica_request_state', default=None)
+_lag_cache = {}
+_lag_lock = threading.Lock()
+
+_LAG_SQL = '''
+    SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+           END
+'''
+
+
+def replica_aliases():
+    return list(getattr(settings, 'DATABASE_REPLICAS', []))
+
+
+def measure_lag(alias):
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return 0.0
+    with connection.cursor() as cursor:
+        cursor.execute(_LAG_SQL)
+        return float(cursor.fetchone()[0])
+
+
+def replica_lag(alias):
+    now = time.monotonic()
+    with _lag_lock:
+        cached = _lag_cache.get(alias)
+        if cached and cached[1] > now:
+            return cached[0]
+    try:
+        lag = measure_lag(alias)
+    except Exception:
+        lag = float('inf')
+    with _lag_lock:
+        _lag_cache[alias] = (lag, now + getattr(settings, 'REPLICA_LAG_CHECK_INTERVAL', 5))
+    return lag
+
+
+def healthy_replicas():
+    threshold = getattr(settings, 'REPLICA_MAX_LAG', 5)
+    return [alias for alias in replica_aliases() if replica_lag(alias) <= threshold]
+
+
+def pin_to_primary():
+    state = _request_state.get()
+    if state is not None:
+        state['pinned'] = True
+
+
+def begin_request(pinned=False):
+    return _request_state.set({'pinned': pinned, 'wrote': False})
+
+
+def end_request(token):
+    state = _request_state.get()
+    _request_state.reset(token)
+    return state
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _request_state.get()
+        if state is None or state['pinned']:
+            return DEFAULT_DB_ALIAS
+        replicas = healthy_replicas()
+        return random.choice(replicas) if replicas else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state['pinned'] = state['wrote'] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        pool = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaPinningMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = begin_request(pinned=request.method not in ('GET', 'HEAD', 'OPTIONS')
+                              or PIN_COOKIE in request.COOKIES)
+        try:
+            response = self.get_response(request)
+        finally:
+            state = end_request(token)
+
+        if state['wrote']:
+            # Keeps the follow-up GET (e.g. a dashboard redirect) on the primary while replicas catch up.
+            response.set_cookie(PIN_COOKIE, '1', max_age=getattr(settings, 'REPLICA_PIN_SECONDS', 10),
+                                httponly=True, samesite='Lax')
+        return response
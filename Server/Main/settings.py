@@ -1,12 +1,16 @@
 from pathlib import Path
 import os
+import sys
 from dotenv import load_dotenv
 from datetime import timedelta
+from django.core.exceptions import ImproperlyConfigured
 
 load_dotenv()
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+TESTING = sys.argv[1:2] == ['test']
+
 SECRET_KEY = os.getenv('SECRET_KEY')
 
 DEBUG = True
@@ -28,6 +32,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework_simplejwt',
     'corsheaders',
     'rest_framework',
@@ -51,8 +56,10 @@ REST_FRAMEWORK = {
 }
 
 MIDDLEWARE = [
+    'Main.instrumentation.RequestInstrumentationMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'Main.routers.ReplicaPinningMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -91,6 +98,92 @@ DATABASES = {
     }
 }
 
+# psycopg3 pool; threads and ASGI sync adapters each check out their own connection.
+if os.getenv('DB_POOL', 'true').lower() in ('1', 'true', 'yes'):
+    # Django passes check=ConnectionPool.check_connection to the pool when CONN_HEALTH_CHECKS is on.
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+            'max_lifetime': float(os.getenv('DB_POOL_MAX_LIFETIME', 30 * 60)),
+            'max_idle': float(os.getenv('DB_POOL_MAX_IDLE', 10 * 60)),
+            'timeout': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+        },
+    }
+else:
+    DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv('DB_CONN_MAX_AGE', 60))
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+
+# Read replicas share the primary's credentials; the test runner mirrors them onto the test database.
+DATABASE_REPLICAS = []
+for index, host in enumerate(filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(',')), start=1):
+    DATABASES[f'replica_{index}'] = {**DATABASES['default'], 'HOST': host.strip(), 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append(f'replica_{index}')
+if TESTING and not DATABASE_REPLICAS:
+    # A second connection to the test database so replica routing runs real queries in CI.
+    # Tests opt in with override_settings(DATABASE_REPLICAS=['replica_1']). It is left unpooled
+    # because the test runner only closes the default pool before dropping the database.
+    DATABASES['replica_1'] = {**DATABASES['default'], 'OPTIONS': {}, 'CONN_MAX_AGE': 0, 'TEST': {'MIRROR': 'default'}}
+
+DATABASE_ROUTERS = ['Main.routers.ReplicaRouter']
+REPLICA_MAX_LAG = float(os.getenv('DB_REPLICA_MAX_LAG', 5))
+REPLICA_LAG_CHECK_INTERVAL = float(os.getenv('DB_REPLICA_LAG_CHECK_INTERVAL', 5))
+REPLICA_PIN_SECONDS = int(os.getenv('DB_REPLICA_PIN_SECONDS', 10))
+
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+
+# Dashboard sessions: database rows behind the cache, or signed cookies with a revocation set.
+SESSION_ENGINE = 'home.signed_sessions' if os.getenv('SESSION_BACKEND') == 'signed' else 'home.sessions'
+if SESSION_ENGINE == 'home.signed_sessions' and not os.getenv('REDIS_URL'):
+    # Revoked cookies are only tracked in the cache, so every worker has to see the same one.
+    raise ImproperlyConfigured('SESSION_BACKEND=signed needs a shared cache; set REDIS_URL.')
+SESSION_STORE_OPTIONS = {
+    'LOCAL_TTL': int(os.getenv('SESSION_LOCAL_TTL', 5)),
+    'LOCAL_MAX_SIZE': int(os.getenv('SESSION_LOCAL_SIZE', 2048)),
+    'CLEANUP_ON_LOGIN': not TESTING,
+    'CLEANUP_INTERVAL': int(os.getenv('SESSION_CLEANUP_INTERVAL', 60 * 60)),
+    'CLEANUP_BATCH_SIZE': int(os.getenv('SESSION_CLEANUP_BATCH_SIZE', 1000)),
+}
+
+# ModelBackend stays listed so sessions created before the cached backend still resolve.
+AUTHENTICATION_BACKENDS = [
+    'authCustom.backends.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+INSTRUMENTATION_SAMPLE_SIZE = int(os.getenv('INSTRUMENTATION_SAMPLE_SIZE', 500))
+INSTRUMENTATION_DUPLICATE_THRESHOLD = int(os.getenv('INSTRUMENTATION_DUPLICATE_THRESHOLD', 5))
+# Tests turn this on so a view exceeding its @query_budget fails instead of logging.
+QUERY_BUDGET_ENFORCE = os.getenv('QUERY_BUDGET_ENFORCE', 'false').lower() in ('1', 'true', 'yes')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'Main.instrumentation': {
+            'handlers': ['console'],
+            'level': os.getenv('INSTRUMENTATION_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -140,4 +233,11 @@ SIMPLE_JWT = {
     "AUTH_COOKIE_HTTP_ONLY": True,
     "AUTH_COOKIE_PATH": "/",
     "AUTH_COOKIE_SAMESITE": "Lax",
+}
+
+# Process-local cache of users resolved from JWTs. Saves and deletes bump a generation in the
+# default cache; without Redis other workers cannot see it, so entries expire sooner.
+AUTH_USER_CACHE = {
+    'TTL': int(os.getenv('AUTH_USER_CACHE_TTL', 60 if os.getenv('REDIS_URL') else 5)),
+    'MAX_SIZE': int(os.getenv('AUTH_USER_CACHE_SIZE', 1024)),
 }
\ No newline at end of file
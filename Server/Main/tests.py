@@ -0,0 +1,193 @@
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TransactionTestCase, override_settings
+from . import routers
+from .metrics import pool_metrics
+from .routers import PIN_COOKIE, ReplicaPinningMiddleware, ReplicaRouter, begin_request, end_request
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1', 'replica_2'], REPLICA_MAX_LAG=5)
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        lag = mock.patch.object(routers, 'replica_lag', return_value=0)
+        self.replica_lag = lag.start()
+        self.addCleanup(lag.stop)
+        self.token = begin_request()
+        self.addCleanup(end_request, self.token)
+
+    def test_reads_go_to_a_replica(self):
+        self.assertIn(self.router.db_for_read(None), ['replica_1', 'replica_2'])
+
+    def test_writes_go_to_primary(self):
+        self.assertEqual(self.router.db_for_write(None), 'default')
+
+    def test_reads_after_a_write_stay_on_primary(self):
+        self.router.db_for_write(None)
+        self.assertEqual(self.router.db_for_read(None), 'default')
+
+    def test_lagging_replica_is_skipped(self):
+        self.replica_lag.side_effect = lambda alias: 60 if alias == 'replica_1' else 0
+        for _ in range(10):
+            self.assertEqual(self.router.db_for_read(None), 'replica_2')
+
+    def test_all_replicas_lagging_falls_back_to_primary(self):
+        self.replica_lag.return_value = 60
+        self.assertEqual(self.router.db_for_read(None), 'default')
+
+    def test_reads_outside_a_request_use_primary(self):
+        token = routers._request_state.set(None)
+        try:
+            self.assertEqual(self.router.db_for_read(None), 'default')
+        finally:
+            routers._request_state.reset(token)
+
+    def test_migrations_only_run_on_primary(self):
+        self.assertTrue(self.router.allow_migrate('default', 'employee'))
+        self.assertFalse(self.router.allow_migrate('replica_1', 'employee'))
+
+
+@override_settings(REPLICA_LAG_CHECK_INTERVAL=60)
+class ReplicaLagTests(SimpleTestCase):
+    def setUp(self):
+        routers._lag_cache.clear()
+        self.addCleanup(routers._lag_cache.clear)
+
+    def test_lag_is_cached_between_checks(self):
+        with mock.patch.object(routers, 'measure_lag', return_value=1.5) as measure:
+            self.assertEqual(routers.replica_lag('replica_1'), 1.5)
+            self.assertEqual(routers.replica_lag('replica_1'), 1.5)
+        measure.assert_called_once_with('replica_1')
+
+    def test_unreachable_replica_counts_as_lagging(self):
+        with mock.patch.object(routers, 'measure_lag', side_effect=OSError):
+            self.assertEqual(routers.replica_lag('replica_1'), float('inf'))
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1'], REPLICA_PIN_SECONDS=10)
+class ReplicaPinningMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.router = ReplicaRouter()
+        lag = mock.patch.object(routers, 'replica_lag', return_value=0)
+        lag.start()
+        self.addCleanup(lag.stop)
+
+    def run_view(self, request, write=False):
+        seen = {}
+
+        def view(request):
+            if write:
+                self.router.db_for_write(None)
+            seen['read'] = self.router.db_for_read(None)
+            return HttpResponse()
+
+        response = ReplicaPinningMiddleware(view)(request)
+        return response, seen['read']
+
+    def test_plain_get_reads_from_replica(self):
+        response, read = self.run_view(self.factory.get('/'))
+        self.assertEqual(read, 'replica_1')
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_unsafe_methods_read_from_primary(self):
+        _, read = self.run_view(self.factory.post('/'))
+        self.assertEqual(read, 'default')
+
+    def test_write_sets_pin_cookie(self):
+        response, read = self.run_view(self.factory.post('/'), write=True)
+        self.assertEqual(read, 'default')
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], 10)
+
+    def test_pin_cookie_keeps_next_get_on_primary(self):
+        request = self.factory.get('/')
+        request.COOKIES[PIN_COOKIE] = '1'
+        _, read = self.run_view(request)
+        self.assertEqual(read, 'default')
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1'], REPLICA_MAX_LAG=5)
+class ReplicaReadYourWritesTests(TransactionTestCase):
+    # Rows must be committed for the replica_1 connection to see them.
+    databases = {'default', 'replica_1'}
+
+    def setUp(self):
+        routers._lag_cache.clear()
+        self.addCleanup(routers._lag_cache.clear)
+        self.user = get_user_model().objects.create_user(username='replica', email='replica@example.com', password='x')
+
+    def run_view(self, request):
+        seen = {}
+
+        def view(request):
+            user = get_user_model().objects.get(pk=self.user.pk)
+            if request.method == 'POST':
+                user.save(update_fields=['last_login'])
+                user = get_user_model().objects.get(pk=self.user.pk)
+            seen['read'] = user._state.db
+            return HttpResponse()
+
+        response = ReplicaPinningMiddleware(view)(request)
+        return response, seen['read']
+
+    def test_get_reads_from_replica(self):
+        _, read = self.run_view(RequestFactory().get('/'))
+        self.assertEqual(read, 'replica_1')
+
+    def test_request_reads_its_own_write_from_primary(self):
+        token = begin_request()
+        try:
+            self.assertEqual(get_user_model().objects.get(pk=self.user.pk)._state.db, 'replica_1')
+            get_user_model().objects.filter(pk=self.user.pk).update(first_name='Written')
+            user = get_user_model().objects.get(pk=self.user.pk)
+        finally:
+            end_request(token)
+        self.assertEqual(user._state.db, 'default')
+        self.assertEqual(user.first_name, 'Written')
+
+    def test_pin_cookie_keeps_the_next_get_on_primary(self):
+        response, read = self.run_view(RequestFactory().post('/'))
+        self.assertEqual(read, 'default')
+        request = RequestFactory().get('/')
+        request.COOKIES[PIN_COOKIE] = response.cookies[PIN_COOKIE].value
+        _, read = self.run_view(request)
+        self.assertEqual(read, 'default')
+
+    @override_settings(REPLICA_MAX_LAG=-1)
+    def test_lagging_replica_falls_back_to_primary(self):
+        _, read = self.run_view(RequestFactory().get('/'))
+        self.assertEqual(read, 'default')
+
+
+class PoolMetricsTests(SimpleTestCase):
+    def test_pooled_connection_reports_metrics(self):
+        settings_dict = {
+            **connections['default'].settings_dict,
+            'CONN_MAX_AGE': 0,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {**connections['default'].settings_dict['OPTIONS'], 'pool': {'min_size': 1, 'max_size': 1, 'timeout': 5}},
+        }
+        pooled = connections['default'].__class__(settings_dict, alias='pool_metrics')
+        connections['pool_metrics'] = pooled
+        self.addCleanup(connections.__delitem__, 'pool_metrics')
+        self.addCleanup(pooled.close_pool)
+
+        with pooled.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            metrics = pool_metrics(pooled)
+        self.assertTrue(metrics['pooled'])
+        self.assertEqual(metrics['max_size'], 1)
+        self.assertEqual(metrics['in_use'], 1)
+
+        pooled.close()
+        metrics = pool_metrics(pooled)
+        self.assertEqual(metrics['in_use'], 0)
+        self.assertGreaterEqual(metrics['checkouts'], 1)
+
+    def test_unpooled_connection_reports_conn_max_age(self):
+        settings_dict = {**connections['default'].settings_dict, 'CONN_MAX_AGE': 60,
+                         'OPTIONS': {key: value for key, value in connections['default'].settings_dict['OPTIONS'].items() if key != 'pool'}}
+        metrics = pool_metrics(connections['default'].__class__(settings_dict, alias='unpooled_metrics'))
+        self.assertEqual(metrics, {'pooled': False, 'conn_max_age': 60})
@@ -1,10 +1,13 @@
 from django.contrib import admin
 from django.urls import path, include
+from .metrics import MetricsView, RouteTimingsView
 
 urlpatterns = [
     path('Admin/', admin.site.urls),
     path('api/v1/auth/', include('authCustom.urls')),
     path('api/v1/', include('employee.urls')),
+    path('api/v1/metrics/', MetricsView.as_view(), name='metrics'),
+    path('api/v1/metrics/routes/', RouteTimingsView.as_view(), name='metrics-routes'),
     #templates include apps
     path('', include('home.urls')),
     path('', include('dashboard.urls')),
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class AuthcustomConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'authCustom'
+
+    def ready(self):
+        from . import signals
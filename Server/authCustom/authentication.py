@@ -1,4 +1,7 @@
+from functools import partial
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from .user_cache import get_cached_user
 
 class CookieJWTAuthentication(JWTAuthentication):
     def authenticate(self, request):
@@ -13,4 +16,10 @@ class CookieJWTAuthentication(JWTAuthentication):
         except:
             return None
         
-        return (user, validated_token)
\ No newline at end of file
+        return (user, validated_token)
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+        return get_cached_user(user_id, partial(super().get_user, validated_token))
@@ -0,0 +1,7 @@
+from django.contrib.auth.backends import ModelBackend
+from .user_cache import get_cached_user
+
+
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        return get_cached_user(user_id, lambda: super(CachedModelBackend, self).get_user(user_id))
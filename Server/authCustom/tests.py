@@ -1,3 +1,51 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
+from .user_cache import _generation_key, clear_user_cache, get_cached_user, user_cache_stats
 
-# Create your tests here.
+User = get_user_model()
+
+
+class UserCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='cached', email='cached@example.com', password='Cached-pass1')
+
+    def setUp(self):
+        cache.clear()
+        clear_user_cache()
+        self.loads = 0
+
+    def load(self):
+        self.loads += 1
+        return User.objects.get(pk=self.user.pk)
+
+    def test_miss_then_hit(self):
+        hits = user_cache_stats()['hits']
+        first = get_cached_user(self.user.pk, self.load)
+        second = get_cached_user(str(self.user.pk), self.load)
+        self.assertEqual(self.loads, 1)
+        self.assertEqual(user_cache_stats()['hits'], hits + 1)
+        self.assertEqual(second.pk, self.user.pk)
+        self.assertIsNot(first, second)
+
+    def test_missing_user_is_not_cached(self):
+        self.assertIsNone(get_cached_user(0, lambda: None))
+        self.assertIsNone(get_cached_user(0, lambda: None))
+        self.assertEqual(user_cache_stats()['size'], 0)
+
+    def test_save_invalidates(self):
+        get_cached_user(self.user.pk, self.load)
+        User.objects.filter(pk=self.user.pk).update(first_name='Renamed')
+        User.objects.get(pk=self.user.pk).save()
+        self.assertEqual(get_cached_user(self.user.pk, self.load).first_name, 'Renamed')
+        self.assertEqual(self.loads, 2)
+
+    def test_invalidation_from_another_worker(self):
+        get_cached_user(self.user.pk, self.load)
+        # Another worker's save only reaches this one through the shared generation.
+        cache.set(_generation_key(self.user.pk), 'bumped-elsewhere')
+        get_cached_user(self.user.pk, self.load)
+        self.assertEqual(self.loads, 2)
+        get_cached_user(self.user.pk, self.load)
+        self.assertEqual(self.loads, 2)
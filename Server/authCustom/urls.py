@@ -9,4 +9,5 @@ urlpatterns = [
     path('register/', Register.as_view(), name='register'),
     path('profile/', ProfileView.as_view(), name='profile'),
     path('change-password/', ChangePasswordView.as_view(), name='change-password'),
+    path('user-cache-stats/', UserCacheStatsView.as_view(), name='user-cache-stats'),
 ]
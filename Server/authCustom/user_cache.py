@@ -0,0 +1,75 @@
+import copy
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import cache
+
+GENERATION_TIMEOUT = 60 * 60 * 24
+
+_entries = OrderedDict()
+_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+
+
+def _setting(name, default):
+    return getattr(settings, 'AUTH_USER_CACHE', {}).get(name, default)
+
+
+def _generation_key(user_id):
+    return f'auth:user-generation:{user_id}'
+
+
+def _current_generation(user_id):
+    # The generation lives in the shared cache so a save on one worker stales every worker's copy.
+    generation = cache.get(_generation_key(user_id))
+    if generation is None:
+        cache.add(_generation_key(user_id), uuid.uuid4().hex, GENERATION_TIMEOUT)
+        generation = cache.get(_generation_key(user_id))
+    return generation
+
+
+def get_cached_user(user_id, load):
+    # Token claims may carry the id as a string while signals see the integer pk.
+    user_id = str(user_id)
+    generation = _current_generation(user_id)
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(user_id)
+        if entry is not None and entry[1] > now and entry[2] == generation:
+            _entries.move_to_end(user_id)
+            _stats['hits'] += 1
+            # Views mutate request.user, so never hand out the shared instance.
+            return copy.copy(entry[0])
+        _stats['misses'] += 1
+
+    user = load()
+    if user is None:
+        return None
+    with _lock:
+        _entries[user_id] = (user, now + _setting('TTL', 60), generation)
+        _entries.move_to_end(user_id)
+        while len(_entries) > _setting('MAX_SIZE', 1024):
+            _entries.popitem(last=False)
+            _stats['evictions'] += 1
+    return copy.copy(user)
+
+
+def invalidate_user(user_id):
+    user_id = str(user_id)
+    cache.set(_generation_key(user_id), uuid.uuid4().hex, GENERATION_TIMEOUT)
+    with _lock:
+        if _entries.pop(user_id, None) is not None:
+            _stats['invalidations'] += 1
+
+
+def clear_user_cache():
+    with _lock:
+        _entries.clear()
+
+
+def user_cache_stats():
+    with _lock:
+        lookups = _stats['hits'] + _stats['misses']
+        return {**_stats, 'size': len(_entries), 'hit_ratio': _stats['hits'] / lookups if lookups else None}
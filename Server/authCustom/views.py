@@ -2,11 +2,12 @@ from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
 from rest_framework.views import APIView
 from .serializers import RegisterSerializer, UserSerializer
 from django.contrib.auth import update_session_auth_hash
 from .utils import upload_to_cloudinary
+from .user_cache import user_cache_stats
 
 class CustomTokenObtainPairView(TokenObtainPairView):
     def post(self, request, *args, **kwargs):
@@ -127,5 +128,8 @@ class ChangePasswordView(APIView):
 
         return Response({'success': True, 'message': 'Password updated successfully.'}, status=status.HTTP_200_OK )
 
+class UserCacheStatsView(APIView):
+    permission_classes = [IsAdminUser]
 
-    
\ No newline at end of file
+    def get(self, request):
+        return Response({'success': True, 'data': user_cache_stats()}, status=status.HTTP_200_OK)
@@ -1,14 +1,26 @@
-from django.shortcuts import render, redirect, get_object_or_404
+from django.shortcuts import redirect, get_object_or_404
+from django.template.response import TemplateResponse
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.contrib.auth.decorators import login_required
-from employee.models import Department, DynamicField, Employee, EmployeeFieldData
+from employee.models import Department, DynamicField, Employee
+from employee.services import create_employee, update_employee_values
+from employee.validation import get_compiled_schema
+from employee.search import search_employees
+from employee.counters import record_employees
+from employee.rollups import monthly_trend
+from employee.schema_diff import SchemaDiffError, apply_field_diff, diff_fields
+from employee.serializers import DynamicFieldInputSerializer
+from employee.schema_cache import bump_schema_version, on_schema_change
 from django.contrib import messages
-from django.db.models import Count
+from django.db import transaction
+from Main.instrumentation import query_budget
 
 
+@query_budget(get=2)
 def dashboard(request):
-    return render(request, 'dashboard.html')
+    return TemplateResponse(request, 'dashboard.html')
 
+@query_budget(get=7)
 @login_required
 def employee_details(request):
     user = request.user
@@ -38,40 +50,33 @@ def employee_details(request):
             for field in dynamic_fields
         ]
 
-        employee_qs = selected_department.employees.all().order_by("-created_at")
+        employee_qs = selected_department.employees.only('id', 'department_id', 'created_at', 'document').order_by("-created_at", "-id")
 
         if search_query:
-            matching_employee_ids = EmployeeFieldData.objects.filter(
-                employee__in=employee_qs,
-                value__icontains=search_query
-            ).values_list('employee_id', flat=True).distinct()
-            employee_qs = employee_qs.filter(id__in=matching_employee_ids)
+            employee_qs = search_employees(employee_qs, search_query).order_by("-created_at", "-id")
 
-        fdata = EmployeeFieldData.objects.filter(employee__in=employee_qs).select_related('field', 'employee')
-
-        fdata_map = {}
-        for fd in fdata:
-            fdata_map.setdefault(fd.employee_id, {})[str(fd.field_id)] = fd.value
+        paginator = Paginator(employee_qs, 5) 
+        if not search_query:
+            paginator.count = selected_department.employee_count
+        try:
+            employees_data = paginator.page(page)
+        except PageNotAnInteger:
+            employees_data = paginator.page(1)
+        except EmptyPage:
+            employees_data = paginator.page(paginator.num_pages)
 
-        employees_data = []
-        for emp in employee_qs:
+        rows = []
+        for emp in employees_data.object_list:
             row = {
                 "id": emp.id,
                 "created_at": emp.created_at,
                 "field_data": {},
             }
             for field in dynamic_fields:
-                val = fdata_map.get(emp.id, {}).get(str(field.id), "") or "-"
+                val = emp.document.get(str(field.id), "") or "-"
                 row["field_data"][str(field.id)] = val
-            employees_data.append(row)
-
-        paginator = Paginator(employees_data, 5) 
-        try:
-            employees_data = paginator.page(page)
-        except PageNotAnInteger:
-            employees_data = paginator.page(1)
-        except EmptyPage:
-            employees_data = paginator.page(paginator.num_pages)
+            rows.append(row)
+        employees_data.object_list = rows
 
     context = {
         'departments': departments,
@@ -84,56 +89,68 @@ def employee_details(request):
         'current_page': employees_data.number if hasattr(employees_data, 'number') else 1,
         'total_pages': employees_data.paginator.num_pages if hasattr(employees_data, 'paginator') else 1,
     }
-    return render(request, 'employee_details.html', context)
+    return TemplateResponse(request, 'employee_details.html', context)
 
+@query_budget(get=4, post=11)
 @login_required
 def employee_edit(request, employee_id):
-    employee = get_object_or_404(Employee, id=employee_id)
+    employee = get_object_or_404(Employee.objects.select_related('department'), id=employee_id)
+
+    schema = get_compiled_schema(employee.department)
+    dynamic_fields = schema.ordered_fields
 
     if request.method == 'POST':
-        for field_data in employee.field_data.all():
-            field_id = str(field_data.field.id)
-            value = request.POST.get(field_id)
+        values = []
+        for field in dynamic_fields:
+            value = request.POST.get(str(field.id))
 
-            if field_data.field.field_type == 'boolean':
-                value = (value == 'on') 
+            # Unchecked checkboxes are left out of the POST entirely.
+            if field.field_type == 'boolean':
+                value = value or ''
 
             if value is not None:
-                field_data.value = value
-                field_data.save()
-
-        return redirect('employee_details') 
+                values.append((field.id, schema.coerce(field.id, value)))
 
-    dynamic_fields = DynamicField.objects.filter(department=employee.department).order_by('order')
+        cleaned, errors = schema.validate(values)
+        if not errors:
+            changed = update_employee_values(employee, cleaned)
+            messages.success(request, f'Employee updated ({changed} values changed).')
+            return redirect('employee_details') 
+        for error in errors:
+            messages.error(request, error)
 
-    field_data_dict = {str(field_data.field.id): field_data.value for field_data in employee.field_data.all()}
+    field_data_dict = {str(field_data.field_id): field_data.value for field_data in employee.field_data.all()}
 
     context = {
         'employee': employee,
         'dynamic_fields': dynamic_fields,
         'field_data_dict': field_data_dict,
     }
-    return render(request, 'employee_edit.html', context)
+    return TemplateResponse(request, 'employee_edit.html', context)
 
 
+@query_budget(get=3, post=9)
 @login_required
 def employee_delete(request, employee_id):
     employee = get_object_or_404(Employee, id=employee_id)
     if request.method == 'POST':
-        employee.delete()
+        with transaction.atomic():
+            employee.delete()
+            record_employees(employee.department_id, -1)
         messages.success(request, 'Employee deleted successfully.')
         return redirect('employee_details') 
 
     context = {
         'employee': employee,
     }
-    return render(request, 'employee_delete.html', context)
+    return TemplateResponse(request, 'employee_delete.html', context)
 
 
+@query_budget(get=5, post=12)
 @login_required
 def employee_create(request):
     user = request.user
-    departments = Department.objects.filter(created_by=user, fields__isnull=False).distinct()
+    departments = Department.objects.filter(created_by=user, has_form=True)
 
     selected_department_id = request.GET.get("department")
     selected_department = None
@@ -151,47 +168,47 @@ def employee_create(request):
         dept_id = request.POST.get("department")
         try:
             selected_department = departments.get(id=dept_id)
-            dynamic_fields = selected_department.fields.order_by('order').all()
         except Department.DoesNotExist:
             messages.error(request, "Invalid department selected.")
             selected_department = None
             dynamic_fields = []
 
         if selected_department:
-            employee = Employee.objects.create(department=selected_department)
+            schema = get_compiled_schema(selected_department)
+            dynamic_fields = schema.ordered_fields
+            values = []
             for field in dynamic_fields:
                 raw_value = request.POST.get(f'field_{field.id}', '')
-                if field.field_type == 'boolean':
-                    value = raw_value == 'on'
-                elif field.field_type == 'number':
-                    try:
-                        value = int(raw_value)
-                    except (ValueError, TypeError):
-                        value = None
-                else:
-                    value = raw_value or ''
-
-                EmployeeFieldData.objects.create(
-                    employee=employee,
-                    field=field,
-                    value=value, )
+                values.append((field.id, schema.coerce(field.id, raw_value)))
 
-            messages.success(request, "Employee created successfully.")
-            return redirect('employee_details')
+            cleaned, errors = schema.validate(values)
+            if not errors:
+                create_employee(selected_department, cleaned.items())
+                messages.success(request, "Employee created successfully.")
+                return redirect('employee_details')
+            for error in errors:
+                messages.error(request, error)
 
     context = {
         'departments': departments,
         'selected_department': selected_department,
         'dynamic_fields': dynamic_fields,
         'is_editing': False,}
-    return render(request, 'add_employee.html', context)
+    return TemplateResponse(request, 'add_employee.html', context)
 
+@query_budget(get=4)
 @login_required
 def department_overview(request):
     user = request.user
-    departments = Department.objects.filter(created_by=user).annotate(total_employees=Count('employees'))
-    return render(request, 'department_overview.html', {'departments': departments})
-
+    departments = list(Department.objects.filter(created_by=user))
+    trend = monthly_trend(departments)
+    for dept in departments:
+        peak = max((abs(net) for _, net in trend[dept.id]), default=0) or 1
+        dept.headcount_bars = [{'month': month, 'net': net, 'height': max(abs(net) * 100 // peak, 4)}
+                               for month, net in trend[dept.id]]
+    return TemplateResponse(request, 'department_overview.html', {'departments': departments})
+
+@query_budget(get=2, post=3)
 @login_required
 def department_create(request):
     if request.method == 'POST':
@@ -201,8 +218,9 @@ def department_create(request):
         messages.success(request, 'Department created successfully!')
         return redirect('department_overview')
 
-    return render(request, 'department_create_edit.html', {'editing': False})
+    return TemplateResponse(request, 'department_create_edit.html', {'editing': False})
 
+@query_budget(get=3, post=7)
 @login_required
 def department_edit(request, dept_id):
     department = get_object_or_404(Department, id=dept_id, created_by=request.user)
@@ -210,22 +228,27 @@ def department_edit(request, dept_id):
     if request.method == 'POST':
         department.name = request.POST.get('name')
         department.label = request.POST.get('label')
-        department.save()
+        with transaction.atomic():
+            department.save()
+            bump_schema_version(department.id)
         messages.success(request, 'Department updated successfully!')
         return redirect('department_overview')
 
-    return render(request, 'department_create_edit.html', {'editing': True, 'd': department})
+    return TemplateResponse(request, 'department_create_edit.html', {'editing': True, 'd': department})
 
+@query_budget(get=3, post=13)
 @login_required
 def department_delete(request, dept_id):
     department = get_object_or_404(Department, id=dept_id, created_by=request.user)
 
     if request.method == 'POST':
-        department.delete()
+        with transaction.atomic():
+            department.delete()
+            on_schema_change(dept_id)
         messages.success(request, 'Department deleted successfully!')
         return redirect('department_overview')
 
-    return render(request, 'department_delete.html', {'department': department})
+    return TemplateResponse(request, 'department_delete.html', {'department': department})
 
 # @login_required
 # def form_create(request):
@@ -270,10 +293,11 @@ def department_delete(request, dept_id):
 #         "error": error,
 #         "success": success, })
 
+@query_budget(get=3, post=9)
 @login_required
 def form_create(request):
     user = request.user
-    departments = Department.objects.filter(created_by=user).exclude(fields__isnull=False).distinct()
+    departments = Department.objects.filter(created_by=user, has_form=False)
     error = ""
     success = False
 
@@ -291,6 +315,7 @@ def form_create(request):
             except Department.DoesNotExist:
                 error = "Invalid department."
             else:
+                submitted = []
                 for i, (lbl, typ) in enumerate(zip(field_labels, field_types)):
                     if not lbl or not typ:
                         continue
@@ -299,23 +324,23 @@ def form_create(request):
                         options = request.POST.getlist(f'field_options_{i}')
                         field_options = [option.strip() for option in options if option.strip()]
 
-                    order = int(field_orders[i]) if i < len(field_orders) else i
+                    order = field_orders[i] if i < len(field_orders) else i
+                    submitted.append({'label': lbl, 'field_type': typ, 'field_options': field_options, 'order': order})
 
-                    DynamicField.objects.create(
-                        department=department,
-                        label=lbl,
-                        field_type=typ,
-                        field_options=field_options if typ == 'select' else None,
-                        order=order,
-                    )
-                success = True
+                serializer = DynamicFieldInputSerializer(data=submitted, many=True)
+                if serializer.is_valid():
+                    apply_field_diff(diff_fields(department, serializer.validated_data))
+                    success = True
+                else:
+                    error = "Please check the field types and order values."
 
-    return render(request, "create_form.html", {
+    return TemplateResponse(request, "create_form.html", {
         "departments": departments,
         "error": error,
         "success": success,
     })
 
+@query_budget(get=4, post=14)
 @login_required
 def form_edit(request, department_id):
     department = get_object_or_404(Department, id=department_id)
@@ -327,25 +352,22 @@ def form_edit(request, department_id):
         field_orders = request.POST.getlist('field_order[]')
         deleted_field_ids = request.POST.getlist('deleted_field_id[]')
 
-        DynamicField.objects.filter(id__in=deleted_field_ids).delete()
-
-        for i, field_id in enumerate(field_ids):
-            if field_id: 
-                field = DynamicField.objects.get(id=field_id, department=department)
-                field.label = field_labels[i]
-                field.field_type = field_types[i]
-                field.order = field_orders[i]
-                field.save()
-            else: 
-                DynamicField.objects.create(
-                    department=department,
-                    label=field_labels[i],
-                    field_type=field_types[i],
-                    order=field_orders[i]
-                )
-
-        messages.success(request, 'Form updated successfully!')
-        return redirect('employee_details') 
+        submitted = [
+            {'id': field_id or None, 'label': field_labels[i], 'field_type': field_types[i], 'order': field_orders[i]}
+            for i, field_id in enumerate(field_ids)
+        ]
+        serializer = DynamicFieldInputSerializer(data=submitted, many=True)
+        if serializer.is_valid():
+            try:
+                diff = apply_field_diff(diff_fields(department, serializer.validated_data, delete_ids=deleted_field_ids))
+            except SchemaDiffError as e:
+                messages.error(request, str(e))
+            else:
+                messages.success(request, f"Form updated successfully! ({len(diff['created'])} added, "
+                                          f"{len(diff['updated'])} changed, {len(diff['deleted'])} removed)")
+                return redirect('employee_details') 
+        else:
+            messages.error(request, 'Please check the field types and order values.')
 
     dynamic_fields = DynamicField.objects.filter(department=department).order_by('order')
 
@@ -353,4 +375,4 @@ def form_edit(request, department_id):
         'department': department,
         'dynamic_fields': dynamic_fields,
     }
-    return render(request, 'form_edit.html', context)
+    return TemplateResponse(request, 'form_edit.html', context)
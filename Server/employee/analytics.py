@@ -0,0 +1,113 @@
+import hashlib
+from django.contrib.postgres.fields import ArrayField
+from django.core.cache import cache
+from django.db.models import Aggregate, Avg, Count, FloatField, Max, Min, Sum
+from django.db.models.functions import TruncMonth, TruncWeek, TruncYear
+from .models import EmployeeFieldData
+from .query import EmployeeQueryError
+
+ANALYTICS_CACHE_TIMEOUT = 60 * 10
+DEFAULT_PERCENTILES = (0.25, 0.5, 0.75, 0.9)
+FACET_TYPES = ('select', 'boolean')
+HISTOGRAM_INTERVALS = {'week': TruncWeek, 'month': TruncMonth, 'year': TruncYear}
+
+
+class PercentileCont(Aggregate):
+    function = 'PERCENTILE_CONT'
+    template = '%(function)s(%(percentiles)s) WITHIN GROUP (ORDER BY %(expressions)s)'
+    output_field = ArrayField(FloatField())
+
+    def __init__(self, expression, percentiles, **extra):
+        # Only validated floats reach the SQL literal.
+        literal = 'ARRAY[%s]::float8[]' % ','.join(repr(float(p)) for p in percentiles)
+        super().__init__(expression, percentiles=literal, **extra)
+
+
+def parse_percentiles(raw):
+    if not raw:
+        return DEFAULT_PERCENTILES
+    try:
+        percentiles = tuple(float(value) for value in raw.split(','))
+    except ValueError:
+        raise EmployeeQueryError('percentiles must be a comma separated list of numbers')
+    if not percentiles or any(not 0 <= p <= 1 for p in percentiles):
+        raise EmployeeQueryError('percentiles must be between 0 and 1')
+    return percentiles
+
+
+def analytics_cache_key(department, kind, request):
+    params = '&'.join(f'{key}={value}' for key, value in sorted(request.GET.items()))
+    digest = hashlib.sha1(params.encode()).hexdigest()
+    return f'employee:analytics:{department.id}:{department.data_version}:{department.schema_version}:{kind}:{digest}'
+
+
+def field_summary(employees, fields, percentiles):
+    rows = (EmployeeFieldData.objects
+            .filter(field__in=fields, employee__in=employees.order_by().values('id'))
+            .values('field_id')
+            .annotate(count=Count('id'),
+                      sum=Sum('value_number'),
+                      avg=Avg('value_number'),
+                      min_number=Min('value_number'),
+                      max_number=Max('value_number'),
+                      min_date=Min('value_date'),
+                      max_date=Max('value_date'),
+                      percentiles=PercentileCont('value_number', percentiles))
+            .order_by())
+    by_field = {row['field_id']: row for row in rows}
+
+    summary = []
+    for field in fields:
+        row = by_field.get(field.id, {})
+        entry = {'field_id': field.id, 'label': field.label, 'field_type': field.field_type,
+                 'count': row.get('count', 0)}
+        if field.field_type == 'number':
+            entry.update({
+                'sum': row.get('sum'),
+                'avg': row.get('avg'),
+                'min': row.get('min_number'),
+                'max': row.get('max_number'),
+                'percentiles': dict(zip((str(p) for p in percentiles), row.get('percentiles') or [])),
+            })
+        else:
+            entry.update({'min': row.get('min_date'), 'max': row.get('max_date')})
+        summary.append(entry)
+    return summary
+
+
+def date_histogram(employees, field, interval):
+    trunc = HISTOGRAM_INTERVALS.get(interval)
+    if trunc is None:
+        raise EmployeeQueryError(f'interval must be one of {", ".join(HISTOGRAM_INTERVALS)}')
+    rows = (EmployeeFieldData.objects
+            .filter(field=field, value_date__isnull=False, employee__in=employees.order_by().values('id'))
+            .annotate(bucket=trunc('value_date'))
+            .values('bucket')
+            .annotate(count=Count('id'))
+            .order_by('bucket'))
+    return [{'bucket': row['bucket'], 'count': row['count']} for row in rows]
+
+
+def field_facets(employees, fields):
+    rows = (EmployeeFieldData.objects
+            .filter(field__in=fields, employee__in=employees.order_by().values('id'))
+            .values('field_id', 'value_text', 'value_bool')
+            .annotate(count=Count('id'))
+            .order_by('field_id', '-count', 'value_text'))
+    counts = {field.id: [] for field in fields}
+    for row in rows:
+        value = row['value_bool'] if row['value_bool'] is not None else row['value_text']
+        counts[row['field_id']].append({'value': value, 'count': row['count']})
+
+    return [{'field_id': field.id, 'label': field.label, 'field_type': field.field_type,
+             'values': counts[field.id]} for field in fields]
+
+
+def cached(key, request, build):
+    if request.GET.get('cache') == '0':
+        return build()
+    result = cache.get(key)
+    if result is None:
+        result = build()
+        cache.set(key, result, ANALYTICS_CACHE_TIMEOUT)
+    return result
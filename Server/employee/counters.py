@@ -0,0 +1,62 @@
+from django.db.models import Case, Count, Exists, F, IntegerField, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .models import Department, DynamicField, Employee
+from .schema_cache import on_schema_change
+from .rollups import record_headcount
+
+
+def record_employees(department_id, delta):
+    Department.objects.filter(id=department_id).update(
+        employee_count=F('employee_count') + delta,
+        data_version=F('data_version') + 1,
+        last_activity=timezone.now())
+    record_headcount(department_id, created=max(delta, 0), deleted=max(-delta, 0))
+
+
+def record_fields(department_id, delta=0):
+    # SET expressions all read the pre-update row, so has_form compares the old count.
+    Department.objects.filter(id=department_id).update(
+        field_count=F('field_count') + delta,
+        has_form=Case(When(field_count__gt=-delta, then=Value(True)), default=Value(False)),
+        schema_version=F('schema_version') + 1,
+        data_version=F('data_version') + 1,
+        last_activity=timezone.now())
+    on_schema_change(department_id)
+
+
+def touch(department_id):
+    Department.objects.filter(id=department_id).update(
+        data_version=F('data_version') + 1,
+        last_activity=timezone.now())
+
+
+def _count(model):
+    return Coalesce(Subquery(model.objects.filter(department=OuterRef('pk'))
+                             .order_by().values('department')
+                             .annotate(total=Count('id')).values('total'),
+                             output_field=IntegerField()), Value(0))
+
+
+def _has_fields():
+    return Exists(DynamicField.objects.filter(department=OuterRef('pk')))
+
+
+def reconcile_counters(departments=None):
+    if departments is None:
+        departments = Department.objects.all()
+
+    drifted = (departments
+               .annotate(actual_employees=_count(Employee),
+                         actual_fields=_count(DynamicField),
+                         actual_has_form=_has_fields())
+               .filter(~Q(employee_count=F('actual_employees'))
+                       | ~Q(field_count=F('actual_fields'))
+                       | ~Q(has_form=F('actual_has_form'))))
+    drifted_ids = list(drifted.values_list('id', flat=True))
+    if drifted_ids:
+        Department.objects.filter(id__in=drifted_ids).update(
+            employee_count=_count(Employee),
+            field_count=_count(DynamicField),
+            has_form=_has_fields())
+    return drifted_ids
@@ -0,0 +1,37 @@
+from django.db.models import Aggregate, F, JSONField, OuterRef, QuerySet, Subquery, TextField, Value
+from django.db.models.functions import Cast, Coalesce
+from .models import Employee, EmployeeFieldData
+from .search import refresh_search_index
+
+
+class JSONBObjectAgg(Aggregate):
+    function = 'JSONB_OBJECT_AGG'
+    output_field = JSONField()
+
+
+def build_document(field_values):
+    return {str(field_id): value for field_id, value in field_values}
+
+
+def document_subquery():
+    return Subquery(EmployeeFieldData.objects.filter(employee=OuterRef('pk'))
+                    .order_by().values('employee')
+                    .annotate(doc=JSONBObjectAgg(Cast('field_id', TextField()), F('value')))
+                    .values('doc'), output_field=JSONField())
+
+
+def expected_document():
+    return Coalesce(document_subquery(), Value({}, output_field=JSONField()))
+
+
+def refresh_documents(employees):
+    if not isinstance(employees, QuerySet):
+        employees = Employee.objects.filter(id__in=list(employees))
+    employees.update(document=expected_document())
+
+
+def sync_employees(employees):
+    if not isinstance(employees, QuerySet):
+        employees = Employee.objects.filter(id__in=list(employees))
+    refresh_documents(employees)
+    refresh_search_index(employees)
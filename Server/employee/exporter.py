@@ -0,0 +1,64 @@
+import csv
+import json
+
+EXPORT_FORMATS = ('csv', 'ndjson')
+EXPORT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+class ExportColumnError(ValueError):
+    pass
+
+
+def select_fields(department, columns=None):
+    fields = list(department.fields.order_by('order', 'id'))
+    if not columns:
+        return fields
+
+    by_key = {}
+    for field in fields:
+        by_key[str(field.id)] = field
+        by_key[field.label.strip().lower()] = field
+
+    selected = []
+    for column in columns.split(','):
+        field = by_key.get(column.strip().lower())
+        if field is None:
+            raise ExportColumnError(f'Unknown column: {column}')
+        selected.append(field)
+    return selected
+
+
+def csv_cell(value):
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+
+def iter_export(queryset, fields, file_format):
+    rows = (queryset.order_by('id')
+            .values_list('id', 'created_at', 'document')
+            .iterator(chunk_size=EXPORT_CHUNK_SIZE))
+    keys = [(str(field.id), field.label) for field in fields]
+
+    if file_format == 'csv':
+        writer = csv.writer(Echo())
+        yield writer.writerow(['id', 'created_at'] + [label for _, label in keys])
+        for employee_id, created_at, document in rows:
+            yield writer.writerow([employee_id, created_at.isoformat()]
+                                  + [csv_cell(document.get(key)) for key, _ in keys])
+    else:
+        for employee_id, created_at, document in rows:
+            yield json.dumps({
+                'id': employee_id,
+                'created_at': created_at.isoformat(),
+                'field_data': {label: document.get(key) for key, label in keys},
+            }) + '\n'
@@ -1,6 +1,11 @@
 import django_filters
-from .models import Department, Employee, DynamicField, EmployeeFieldData
-from django.db.models import Q
+from django.db.models import F, FilteredRelation, Q
+from .models import Department, DynamicField, Employee
+from .query import EmployeeQueryError, compile_filter
+from .search import search_employees
+from .typed_values import VALUE_COLUMNS, text_key
+
+BUILTIN_ORDERING = ('id', 'created_at')
 
 class DepartmentFilter(django_filters.FilterSet):
     name = django_filters.CharFilter(lookup_expr='icontains')
@@ -12,24 +17,52 @@ class DepartmentFilter(django_filters.FilterSet):
 
 class EmployeeFilter(django_filters.FilterSet):
     search = django_filters.CharFilter(method='filter_search')
+    filter = django_filters.CharFilter(method='filter_structured')
+    # Declared last so it overrides the rank ordering applied by search.
+    ordering = django_filters.CharFilter(method='filter_ordering')
 
     class Meta:
         model = Employee
-        fields = ['search']
+        fields = ['search', 'filter', 'ordering']
 
     def filter_search(self, queryset, name, value):
         department_id = self.request.parser_context['kwargs'].get('id')
         if not department_id:
             return queryset.none()
 
-        dynamic_fields = DynamicField.objects.filter(department_id=department_id)
+        return search_employees(queryset, value)
+
+    def filter_structured(self, queryset, name, value):
+        department_id = self.request.parser_context['kwargs'].get('id')
+        if not department_id:
+            return queryset.none()
+
+        return queryset.filter(compile_filter(department_id, value))
+
+    def filter_ordering(self, queryset, name, value):
+        descending = value.startswith('-')
+        key = value.lstrip('-')
+        if key in BUILTIN_ORDERING:
+            return queryset.order_by(value, '-id' if descending else 'id')
+
+        department_id = self.request.parser_context['kwargs'].get('id')
+        field = None
+        if key.isdigit():
+            field = DynamicField.objects.filter(id=key, department_id=department_id).only('id', 'field_type').first()
+        column = VALUE_COLUMNS.get(field.field_type) if field else None
+        if column is None:
+            raise EmployeeQueryError(f'Cannot order by {value}')
 
-        matching_employee_ids = set()
-        for field in dynamic_fields:
-            field_data_qs = EmployeeFieldData.objects.filter(field=field)
-            for field_data in field_data_qs:
-                if value.lower() in str(field_data.value).lower():
-                    matching_employee_ids.add(field_data.employee_id)
+        sort_value = text_key(f'sort_data__{column}') if column == 'value_text' else F(f'sort_data__{column}')
+        return (queryset
+                .annotate(sort_data=FilteredRelation('field_data', condition=Q(field_data__field_id=field.id)))
+                .order_by(sort_value.desc(nulls_last=True) if descending else sort_value.asc(nulls_last=True),
+                          '-id' if descending else 'id'))
 
-        return queryset.filter(id__in=matching_employee_ids)
 
+def filter_employees(request, department_id, queryset):
+    filterset = EmployeeFilter(data=request.GET, queryset=queryset, request=request)
+    filterset.request.parser_context = {'kwargs': {'id': department_id}}
+    if not filterset.is_valid():
+        raise EmployeeQueryError(filterset.errors)
+    return filterset.qs
@@ -0,0 +1,158 @@
+import codecs
+import csv
+import json
+import time
+from django.db import transaction
+from .counters import record_employees
+from .documents import build_document
+from .models import Employee, EmployeeFieldData
+from .search import refresh_search_index
+from .typed_values import build_field_data
+from .validation import get_compiled_schema
+
+IMPORT_FORMATS = ('csv', 'ndjson')
+MAX_REPORTED_ERRORS = 1000
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+def detect_format(filename, content_type=''):
+    name = (filename or '').lower()
+    if name.endswith('.csv') or 'csv' in content_type:
+        return 'csv'
+    if name.endswith(('.ndjson', '.jsonl')) or 'ndjson' in content_type:
+        return 'ndjson'
+    raise ImportFormatError('Unable to detect import format, pass file_format=csv or file_format=ndjson')
+
+
+class DecodedLines:
+    # Decodes line by line so one bad byte sequence only fails the row it is on.
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.error = None
+
+    def __iter__(self):
+        for index, raw in enumerate(self.stream):
+            if index == 0:
+                raw = raw.removeprefix(codecs.BOM_UTF8)
+            try:
+                yield raw.decode('utf-8')
+            except UnicodeDecodeError as e:
+                self.error = e
+                yield raw.decode('utf-8', errors='replace')
+
+    def pop_error(self):
+        error, self.error = self.error, None
+        return error
+
+
+def iter_rows(stream, file_format):
+    lines = DecodedLines(stream)
+    if file_format == 'csv':
+        for row in csv.DictReader(lines):
+            yield lines.pop_error() or row
+    elif file_format == 'ndjson':
+        for line in lines:
+            error = lines.pop_error()
+            if error is not None:
+                yield error
+                continue
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                row = e
+            yield row
+    else:
+        raise ImportFormatError(f'Unsupported import format: {file_format}')
+
+
+class EmployeeImporter:
+
+    def __init__(self, department, batch_size=1000):
+        self.department = department
+        self.batch_size = batch_size
+        self.schema = get_compiled_schema(department)
+        self.rows = 0
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+
+    def report(self, line, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': line, 'error': message})
+
+    def validate_row(self, row, coerce):
+        raw_values = []
+        messages = []
+        for column, raw in row.items():
+            if coerce and raw is None:
+                continue
+            field = self.schema.resolve(column)
+            if field is None:
+                messages.append(f'Unknown column: {column}')
+                continue
+            raw_values.append((field.id, self.schema.coerce(field.id, raw) if coerce else raw))
+
+        values, errors = self.schema.validate(raw_values)
+        messages.extend(errors)
+        missing = self.schema.missing_labels(values)
+        if missing and not messages:
+            messages.append(f"Missing required fields: {', '.join(missing)}")
+        return values, messages
+
+    def write(self, batch):
+        with transaction.atomic():
+            employees = Employee.objects.bulk_create([
+                Employee(department=self.department, document=build_document(values.items()))
+                for values in batch
+            ], batch_size=self.batch_size)
+            EmployeeFieldData.objects.bulk_create([
+                build_field_data(employee, self.schema.fields[field_id], value)
+                for employee, values in zip(employees, batch)
+                for field_id, value in values.items()
+            ], batch_size=self.batch_size)
+            refresh_search_index([employee.id for employee in employees])
+            record_employees(self.department.id, len(employees))
+        self.created += len(employees)
+
+    def run(self, stream, file_format):
+        started = time.monotonic()
+        batch = []
+        for line, row in enumerate(iter_rows(stream, file_format), start=1):
+            self.rows += 1
+            if isinstance(row, UnicodeDecodeError):
+                self.report(line, f'Invalid UTF-8: {row}')
+                continue
+            if isinstance(row, Exception):
+                self.report(line, f'Invalid JSON: {row}')
+                continue
+            if not isinstance(row, dict):
+                self.report(line, 'Row must be an object')
+                continue
+            values, messages = self.validate_row(row, coerce=file_format == 'csv')
+            if messages:
+                self.report(line, '; '.join(messages))
+                continue
+            batch.append(values)
+            if len(batch) >= self.batch_size:
+                self.write(batch)
+                batch = []
+        if batch:
+            self.write(batch)
+
+        elapsed = time.monotonic() - started
+        return {
+            'rows': self.rows,
+            'created': self.created,
+            'failed': self.failed,
+            'errors': self.errors,
+            'elapsed_seconds': round(elapsed, 3),
+            'rows_per_second': round(self.rows / elapsed, 1) if elapsed else None,
+        }
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from employee.models import EmployeeFieldData
+from employee.typed_values import refresh_typed_values
+
+
+class Command(BaseCommand):
+    help = 'Fill the typed value columns of EmployeeFieldData in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--department', type=int, help='Only backfill values of this department')
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        queryset = EmployeeFieldData.objects.all()
+        if options['department']:
+            queryset = queryset.filter(field__department_id=options['department'])
+
+        updated = refresh_typed_values(queryset, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Backfilled typed values for {updated} rows'))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+from employee.importer import IMPORT_FORMATS, EmployeeImporter, ImportFormatError, detect_format
+from employee.models import Department
+
+
+class Command(BaseCommand):
+    help = 'Stream employees from a CSV or NDJSON file into a department'
+
+    def add_arguments(self, parser):
+        parser.add_argument('department', type=int)
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=IMPORT_FORMATS)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        try:
+            department = Department.objects.get(id=options['department'])
+        except Department.DoesNotExist:
+            raise CommandError(f"Department {options['department']} not found")
+
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        try:
+            file_format = options['format'] or detect_format(options['path'])
+            importer = EmployeeImporter(department, batch_size=options['batch_size'])
+            with open(options['path'], 'rb') as stream:
+                result = importer.run(stream, file_format)
+        except ImportFormatError as e:
+            raise CommandError(str(e))
+
+        for error in result['errors']:
+            self.stderr.write(f"row {error['row']}: {error['error']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['created']} created, {result['failed']} failed out of {result['rows']} rows "
+            f"in {result['elapsed_seconds']}s ({result['rows_per_second']} rows/s)"))
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F, Q
+from employee.documents import expected_document, refresh_documents
+from employee.models import Employee
+
+
+class Command(BaseCommand):
+    help = 'Rebuild or verify the per-employee field document'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--department', type=int, help='Only process employees of this department')
+        parser.add_argument('--verify', action='store_true', help='Report stale documents without rewriting them')
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        queryset = Employee.objects.order_by('id')
+        if options['department']:
+            queryset = queryset.filter(department_id=options['department'])
+
+        batch_size = options['batch_size']
+        last_id = 0
+        checked = 0
+        stale = 0
+        while True:
+            ids = list(queryset.filter(id__gt=last_id).values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            batch = Employee.objects.filter(id__in=ids)
+            stale_ids = list(batch.annotate(expected=expected_document())
+                             .filter(~Q(document=F('expected')))
+                             .values_list('id', flat=True))
+            stale += len(stale_ids)
+            if stale_ids and not options['verify']:
+                refresh_documents(Employee.objects.filter(id__in=stale_ids))
+            checked += len(ids)
+            last_id = ids[-1]
+
+        if options['verify']:
+            style = self.style.SUCCESS if not stale else self.style.ERROR
+            self.stdout.write(style(f'{stale} of {checked} employee documents are stale'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt {stale} of {checked} employee documents'))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from employee.models import Department
+from employee.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = ('Recompute daily and monthly headcount rollups from employee creation dates; '
+            'past deletions are dropped from the history')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--department', type=int, help='Only rebuild this department')
+
+    def handle(self, *args, **options):
+        departments = Department.objects.all()
+        if options['department']:
+            departments = departments.filter(id=options['department'])
+
+        rebuilt = rebuild_rollups(departments)
+        self.stdout.write(self.style.SUCCESS(f'{rebuilt} rollup buckets rebuilt'))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from employee.models import Employee
+from employee.search import refresh_search_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the employee search index from EmployeeFieldData'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--department', type=int, help='Only rebuild employees of this department')
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        queryset = Employee.objects.order_by('id')
+        if options['department']:
+            queryset = queryset.filter(department_id=options['department'])
+
+        batch_size = options['batch_size']
+        last_id = 0
+        total = 0
+        while True:
+            ids = list(queryset.filter(id__gt=last_id).values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            refresh_search_index(Employee.objects.filter(id__in=ids))
+            total += len(ids)
+            last_id = ids[-1]
+            self.stdout.write(f'indexed {total} employees')
+
+        self.stdout.write(self.style.SUCCESS(f'Search index rebuilt for {total} employees'))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from employee.counters import reconcile_counters
+from employee.models import Department
+
+
+class Command(BaseCommand):
+    help = 'Recompute stored department counters and fix any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--department', type=int, help='Only reconcile this department')
+
+    def handle(self, *args, **options):
+        departments = Department.objects.all()
+        if options['department']:
+            departments = departments.filter(id=options['department'])
+
+        fixed = reconcile_counters(departments)
+        for department_id in fixed:
+            self.stdout.write(f'fixed counters for department {department_id}')
+        self.stdout.write(self.style.SUCCESS(f'{len(fixed)} departments reconciled'))
@@ -0,0 +1,47 @@
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee', '0004_alter_dynamicfield_field_type'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='employee',
+            name='search_document',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='employee',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='employee_search_vector_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_document'], name='employee_search_trgm_gin', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.RunSQL(
+            sql="""
+                UPDATE employee_employee e
+                SET search_document = d.doc,
+                    search_vector = to_tsvector('simple'::regconfig, d.doc)
+                FROM (
+                    SELECT employee_id, lower(string_agg(value #>> '{}', ' ')) AS doc
+                    FROM employee_employeefielddata
+                    GROUP BY employee_id
+                ) d
+                WHERE d.employee_id = e.id
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,34 @@
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee', '0005_employee_search_document_employee_search_vector_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='document',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['document'], name='employee_document_gin'),
+        ),
+        migrations.RunSQL(
+            sql="""
+                UPDATE employee_employee e
+                SET document = d.doc
+                FROM (
+                    SELECT employee_id, jsonb_object_agg(field_id::text, value) AS doc
+                    FROM employee_employeefielddata
+                    GROUP BY employee_id
+                ) d
+                WHERE d.employee_id = e.id
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
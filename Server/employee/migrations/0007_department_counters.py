@@ -0,0 +1,40 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee', '0006_employee_document'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='department',
+            name='employee_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='department',
+            name='field_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='department',
+            name='has_form',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='department',
+            name='last_activity',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunSQL(
+            sql="""
+                UPDATE employee_department d
+                SET employee_count = (SELECT COUNT(*) FROM employee_employee e WHERE e.department_id = d.id),
+                    field_count = (SELECT COUNT(*) FROM employee_dynamicfield f WHERE f.department_id = d.id),
+                    has_form = EXISTS (SELECT 1 FROM employee_dynamicfield f WHERE f.department_id = d.id)
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
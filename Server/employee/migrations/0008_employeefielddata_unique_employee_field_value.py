@@ -0,0 +1,25 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee', '0007_department_counters'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+                DELETE FROM employee_employeefielddata d
+                USING employee_employeefielddata newer
+                WHERE d.employee_id = newer.employee_id
+                  AND d.field_id = newer.field_id
+                  AND d.id < newer.id
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddConstraint(
+            model_name='employeefielddata',
+            constraint=models.UniqueConstraint(fields=('employee', 'field'), name='unique_employee_field_value'),
+        ),
+    ]
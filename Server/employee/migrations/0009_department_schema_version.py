@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee', '0008_employeefielddata_unique_employee_field_value'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='department',
+            name='schema_version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
@@ -0,0 +1,47 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee', '0009_department_schema_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employeefielddata',
+            name='value_number',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='employeefielddata',
+            name='value_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='employeefielddata',
+            name='value_text',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='employeefielddata',
+            name='value_bool',
+            field=models.BooleanField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='employeefielddata',
+            index=models.Index(condition=models.Q(('value_number__isnull', False)), fields=['field', 'value_number'], name='efd_value_number_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employeefielddata',
+            index=models.Index(condition=models.Q(('value_date__isnull', False)), fields=['field', 'value_date'], name='efd_value_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employeefielddata',
+            index=models.Index(condition=models.Q(('value_text__isnull', False)), fields=['field', 'value_text'], name='efd_value_text_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employeefielddata',
+            index=models.Index(condition=models.Q(('value_bool__isnull', False)), fields=['field', 'value_bool'], name='efd_value_bool_idx'),
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee', '0010_employeefielddata_typed_values'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='department',
+            name='data_version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
@@ -0,0 +1,26 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee', '0011_department_data_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HeadcountRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('day', 'Day'), ('month', 'Month')], max_length=10)),
+                ('bucket', models.DateField()),
+                ('created', models.PositiveIntegerField(default=0)),
+                ('deleted', models.PositiveIntegerField(default=0)),
+                ('department', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='headcount_rollups', to='employee.department')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('department', 'period', 'bucket'), name='unique_headcount_bucket')],
+            },
+        ),
+    ]
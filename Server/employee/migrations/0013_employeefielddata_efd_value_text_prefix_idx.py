@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-18 17:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee', '0012_headcountrollup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='employeefielddata',
+            index=models.Index(condition=models.Q(('value_text__isnull', False)), fields=['field', 'value_text'], name='efd_value_text_prefix_idx', opclasses=['int8_ops', 'text_pattern_ops']),
+        ),
+    ]
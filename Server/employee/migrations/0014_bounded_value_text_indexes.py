@@ -0,0 +1,31 @@
+# Generated by Django 5.2.4 on 2026-10-18 17:25
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee', '0013_employeefielddata_efd_value_text_prefix_idx'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='employeefielddata',
+            name='efd_value_text_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='employeefielddata',
+            name='efd_value_text_prefix_idx',
+        ),
+        migrations.AddIndex(
+            model_name='employeefielddata',
+            index=models.Index(models.F('field'), django.db.models.functions.text.Left('value_text', 256), condition=models.Q(('value_text__isnull', False)), name='efd_value_text_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employeefielddata',
+            index=models.Index(models.F('field'), django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Left('value_text', 256), name='text_pattern_ops'), condition=models.Q(('value_text__isnull', False)), name='efd_value_text_prefix_idx'),
+        ),
+    ]
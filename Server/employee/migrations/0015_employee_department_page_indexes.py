@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-18 17:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee', '0014_bounded_value_text_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['department', 'id'], name='employee_dept_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['department', 'created_at', 'id'], name='employee_dept_created_idx'),
+        ),
+    ]
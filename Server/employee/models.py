@@ -1,14 +1,26 @@
 from django.db import models
 from django.contrib.auth import  get_user_model
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db.models.functions import Left
+from django.contrib.postgres.search import SearchVectorField
 
 User = get_user_model()
 
+# B-tree entries must stay under ~2.7 KB, so text values are only indexed by their first characters.
+TEXT_KEY_LENGTH = 256
+
 class Department(models.Model):
     name = models.CharField(max_length=100)
     label = models.CharField(max_length=100)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='departments')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    employee_count = models.PositiveIntegerField(default=0)
+    field_count = models.PositiveIntegerField(default=0)
+    has_form = models.BooleanField(default=False)
+    last_activity = models.DateTimeField(null=True, blank=True)
+    schema_version = models.PositiveIntegerField(default=1)
+    data_version = models.PositiveIntegerField(default=1)
     
     def __str__(self):
         return f"{self.name} - {self.label}"
@@ -37,6 +49,19 @@ class DynamicField(models.Model):
 class Employee(models.Model):
     department = models.ForeignKey(Department, on_delete=models.CASCADE, related_name='employees')
     created_at = models.DateTimeField(auto_now_add=True)
+    document = models.JSONField(default=dict, blank=True)
+    search_document = models.TextField(blank=True, default='')
+    search_vector = SearchVectorField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['document'], name='employee_document_gin'),
+            GinIndex(fields=['search_vector'], name='employee_search_vector_gin'),
+            GinIndex(fields=['search_document'], name='employee_search_trgm_gin', opclasses=['gin_trgm_ops']),
+            # Cursor pages by id and dashboard pages by (-created_at, -id) within one department.
+            models.Index(fields=['department', 'id'], name='employee_dept_id_idx'),
+            models.Index(fields=['department', 'created_at', 'id'], name='employee_dept_created_idx'),
+        ]
 
     def __str__(self):
         return f"Employee #{self.id} - {self.department.name}"
@@ -45,6 +70,48 @@ class EmployeeFieldData(models.Model):
     employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='field_data')
     field = models.ForeignKey(DynamicField, on_delete=models.CASCADE)
     value = models.JSONField()
+    value_number = models.FloatField(null=True, blank=True)
+    value_date = models.DateField(null=True, blank=True)
+    value_text = models.TextField(null=True, blank=True)
+    value_bool = models.BooleanField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['employee', 'field'], name='unique_employee_field_value'),
+        ]
+        indexes = [
+            models.Index(fields=['field', 'value_number'], name='efd_value_number_idx',
+                         condition=models.Q(value_number__isnull=False)),
+            models.Index(fields=['field', 'value_date'], name='efd_value_date_idx',
+                         condition=models.Q(value_date__isnull=False)),
+            models.Index(models.F('field'), Left('value_text', TEXT_KEY_LENGTH), name='efd_value_text_idx',
+                         condition=models.Q(value_text__isnull=False)),
+            # LIKE 'abc%' can only use a B-tree index under non-C collations with text_pattern_ops.
+            models.Index(models.F('field'), OpClass(Left('value_text', TEXT_KEY_LENGTH), name='text_pattern_ops'),
+                         name='efd_value_text_prefix_idx', condition=models.Q(value_text__isnull=False)),
+            models.Index(fields=['field', 'value_bool'], name='efd_value_bool_idx',
+                         condition=models.Q(value_bool__isnull=False)),
+        ]
+
+    def __str__(self):
+        return f"{self.field.label} - {self.value}"
+
+class HeadcountRollup(models.Model):
+    PERIODS = [
+        ('day', 'Day'),
+        ('month', 'Month'),
+    ]
+
+    department = models.ForeignKey(Department, on_delete=models.CASCADE, related_name='headcount_rollups')
+    period = models.CharField(max_length=10, choices=PERIODS)
+    bucket = models.DateField()
+    created = models.PositiveIntegerField(default=0)
+    deleted = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['department', 'period', 'bucket'], name='unique_headcount_bucket'),
+        ]
 
     def __str__(self):
-        return f"{self.field.label} - {self.value}"
\ No newline at end of file
+        return f"{self.department_id} {self.period} {self.bucket}: +{self.created} -{self.deleted}"
\ No newline at end of file
@@ -1,6 +1,47 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+from django.db import connections
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 class defaultPagination(PageNumberPagination):
     page_size = 6
     page_size_query_param = 'page_size'
     max_page_size = 100
+
+
+def estimate_count(queryset):
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EmployeeCursorPagination(CursorPagination):
+    page_size = 6
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('id',)
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = None
+        count_mode = request.query_params.get(self.count_query_param)
+        if count_mode == 'exact':
+            self.count = queryset.count()
+        elif count_mode == 'estimate':
+            self.count = estimate_count(queryset)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.count is not None:
+            response.data['count'] = self.count
+        return response
+
+
+def get_employee_paginator(request):
+    if request.query_params.get('pagination') == 'cursor':
+        return EmployeeCursorPagination()
+    return defaultPagination()
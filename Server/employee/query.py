@@ -0,0 +1,132 @@
+import json
+from django.db.models import Exists, OuterRef, Q
+from django.utils.dateparse import parse_date
+from .models import TEXT_KEY_LENGTH, DynamicField, EmployeeFieldData
+from .typed_values import VALUE_COLUMNS, text_key
+
+OPERATORS = ('eq', 'in', 'range', 'prefix', 'is_null', 'boolean')
+RANGE_BOUNDS = ('gt', 'gte', 'lt', 'lte')
+MAX_PREDICATES = 20
+
+
+class EmployeeQueryError(ValueError):
+    pass
+
+
+def _number(field, value):
+    if isinstance(value, bool):
+        raise EmployeeQueryError(f'{field.label} expects a number')
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise EmployeeQueryError(f'{field.label} expects a number')
+
+
+def _date(field, value):
+    try:
+        parsed = parse_date(str(value))
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise EmployeeQueryError(f'{field.label} expects a YYYY-MM-DD date')
+    return parsed
+
+
+def _bool(field, value):
+    if not isinstance(value, bool):
+        raise EmployeeQueryError(f'{field.label} expects true or false')
+    return value
+
+
+def _text(field, value):
+    if not isinstance(value, (str, int, float)) or isinstance(value, bool):
+        raise EmployeeQueryError(f'{field.label} expects a string')
+    return str(value)
+
+
+CONVERTERS = {'number': _number, 'date': _date, 'boolean': _bool}
+
+
+def _convert(field, value):
+    return CONVERTERS.get(field.field_type, _text)(field, value)
+
+
+def parse_predicates(raw):
+    try:
+        predicates = json.loads(raw)
+    except json.JSONDecodeError:
+        raise EmployeeQueryError('filter must be a JSON list of predicates')
+    if isinstance(predicates, dict):
+        predicates = [predicates]
+    if not isinstance(predicates, list) or not all(isinstance(p, dict) for p in predicates):
+        raise EmployeeQueryError('filter must be a JSON list of predicates')
+    if len(predicates) > MAX_PREDICATES:
+        raise EmployeeQueryError(f'At most {MAX_PREDICATES} predicates are allowed')
+    return predicates
+
+
+def compile_predicate(field, op, value):
+    column = VALUE_COLUMNS.get(field.field_type)
+    if column is None:
+        raise EmployeeQueryError(f'{field.label} cannot be filtered')
+
+    if op == 'is_null':
+        has_value = Exists(EmployeeFieldData.objects.filter(
+            employee=OuterRef('pk'), field_id=field.id, **{f'{column}__isnull': False}))
+        return ~has_value if _bool(field, value) else has_value
+
+    if op == 'eq':
+        lookup = {column: _convert(field, value)}
+    elif op == 'in':
+        if not isinstance(value, list) or not value:
+            raise EmployeeQueryError(f'{field.label} "in" expects a non-empty list')
+        lookup = {f'{column}__in': [_convert(field, item) for item in value]}
+    elif op == 'range':
+        if field.field_type not in ('number', 'date'):
+            raise EmployeeQueryError(f'{field.label} does not support range')
+        if not isinstance(value, dict) or not value or set(value) - set(RANGE_BOUNDS):
+            raise EmployeeQueryError(f'{field.label} range expects an object with {", ".join(RANGE_BOUNDS)}')
+        lookup = {f'{column}__{bound}': _convert(field, bound_value) for bound, bound_value in value.items()}
+    elif op == 'prefix':
+        if column != 'value_text':
+            raise EmployeeQueryError(f'{field.label} does not support prefix')
+        lookup = {f'{column}__startswith': _text(field, value)}
+    elif op == 'boolean':
+        if field.field_type != 'boolean':
+            raise EmployeeQueryError(f'{field.label} is not a boolean field')
+        lookup = {column: _bool(field, value)}
+    else:
+        raise EmployeeQueryError(f'Unknown operator {op}, expected one of {", ".join(OPERATORS)}')
+
+    values = EmployeeFieldData.objects.filter(employee=OuterRef('pk'), field_id=field.id)
+    if column == 'value_text':
+        # Only the indexed prefix of long values is in the B-tree; the full value is rechecked after.
+        values = values.annotate(text_key=text_key()).filter(**_text_key_lookup(lookup))
+    return Exists(values.filter(**lookup))
+
+
+def _text_key_lookup(lookup):
+    (name, value), = lookup.items()
+    key = name.replace('value_text', 'text_key', 1)
+    if isinstance(value, list):
+        return {key: [item[:TEXT_KEY_LENGTH] for item in value]}
+    return {key: value[:TEXT_KEY_LENGTH]}
+
+
+def compile_filter(department_id, raw):
+    predicates = parse_predicates(raw)
+    field_ids = set()
+    for predicate in predicates:
+        field_id = predicate.get('field')
+        if not isinstance(field_id, int) or isinstance(field_id, bool):
+            raise EmployeeQueryError('Each predicate needs an integer "field"')
+        field_ids.add(field_id)
+
+    fields = {field.id: field for field in DynamicField.objects.filter(department_id=department_id, id__in=field_ids)}
+    condition = Q()
+    for predicate in predicates:
+        field = fields.get(predicate['field'])
+        if field is None:
+            raise EmployeeQueryError(f"Field {predicate['field']} does not belong to this department")
+        condition &= Q(compile_predicate(field, predicate.get('op', 'eq'), predicate.get('value')))
+    return condition
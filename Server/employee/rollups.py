@@ -0,0 +1,81 @@
+from datetime import date
+from django.db import connection, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+from .models import Employee, HeadcountRollup
+
+PERIODS = ('day', 'month')
+
+_UPSERT = '''
+    INSERT INTO {table} AS rollup (department_id, period, bucket, created, deleted)
+    VALUES (%s, 'day', %s, %s, %s), (%s, 'month', %s, %s, %s)
+    ON CONFLICT (department_id, period, bucket) DO UPDATE
+    SET created = rollup.created + EXCLUDED.created,
+        deleted = rollup.deleted + EXCLUDED.deleted
+'''
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def record_headcount(department_id, created=0, deleted=0, day=None):
+    if not created and not deleted:
+        return
+    day = day or timezone.localdate()
+    sql = _UPSERT.format(table=connection.ops.quote_name(HeadcountRollup._meta.db_table))
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [department_id, day, created, deleted,
+                             department_id, month_start(day), created, deleted])
+
+
+def rebuild_rollups(departments):
+    # Deleted employees leave no rows behind, so the rebuilt series only counts the employees
+    # that still exist, bucketed by creation date; past deletions are dropped from the history.
+    truncs = {'day': TruncDate('created_at'), 'month': TruncMonth('created_at')}
+    rebuilt = 0
+    with transaction.atomic():
+        HeadcountRollup.objects.filter(department__in=departments).delete()
+        for period, trunc in truncs.items():
+            rows = (Employee.objects.filter(department__in=departments)
+                    .annotate(bucket=trunc).values('department_id', 'bucket')
+                    .annotate(total=Count('id')).order_by())
+            rollups = [HeadcountRollup(department_id=row['department_id'], period=period,
+                                       bucket=row['bucket'] if period == 'day' else row['bucket'].date(),
+                                       created=row['total']) for row in rows]
+            HeadcountRollup.objects.bulk_create(rollups, batch_size=2000)
+            rebuilt += len(rollups)
+    return rebuilt
+
+
+def headcount_series(department, period, start=None, end=None):
+    rollups = HeadcountRollup.objects.filter(department=department, period=period)
+    if start:
+        start = month_start(start) if period == 'month' else start
+        baseline = rollups.filter(bucket__lt=start).aggregate(created=Sum('created'), deleted=Sum('deleted'))
+        headcount = (baseline['created'] or 0) - (baseline['deleted'] or 0)
+        rollups = rollups.filter(bucket__gte=start)
+    else:
+        headcount = 0
+    if end:
+        rollups = rollups.filter(bucket__lte=end)
+
+    series = []
+    for bucket, created, deleted in rollups.order_by('bucket').values_list('bucket', 'created', 'deleted'):
+        headcount += created - deleted
+        series.append({'bucket': bucket, 'created': created, 'deleted': deleted, 'headcount': headcount})
+    return series
+
+
+def monthly_trend(departments, months=12):
+    today = timezone.localdate()
+    index = today.year * 12 + today.month - 1 - (months - 1)
+    buckets = [date(i // 12, i % 12 + 1, 1) for i in range(index, index + months)]
+    trend = {department.id: dict.fromkeys(buckets, 0) for department in departments}
+    rows = (HeadcountRollup.objects
+            .filter(department__in=departments, period='month', bucket__gte=buckets[0])
+            .values_list('department_id', 'bucket', F('created') - F('deleted')))
+    for department_id, bucket, net in rows:
+        trend[department_id][bucket] = net
+    return {department_id: list(values.items()) for department_id, values in trend.items()}
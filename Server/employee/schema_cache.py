@@ -0,0 +1,84 @@
+import threading
+from collections import OrderedDict
+from functools import partial
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from Main.caches import is_shared_cache
+from .models import Department
+
+SCHEMA_CACHE_TIMEOUT = 60 * 60 * 24
+LOCAL_CACHE_SIZE = 256
+# Without a shared cache other workers only see a new version once their copy expires.
+LOCAL_VERSION_TIMEOUT = 5
+
+_local_schemas = OrderedDict()
+_local_lock = threading.Lock()
+
+
+def _version_key(department_id):
+    return f'employee:schema-version:{department_id}'
+
+
+def _schema_key(department_id, version):
+    return f'employee:schema:{department_id}:{version}'
+
+
+def _version_timeout():
+    return SCHEMA_CACHE_TIMEOUT if is_shared_cache() else LOCAL_VERSION_TIMEOUT
+
+
+def publish_schema_version(department_id):
+    version = Department.objects.filter(id=department_id).values_list('schema_version', flat=True).first()
+    if version is None:
+        cache.delete(_version_key(department_id))
+    else:
+        cache.set(_version_key(department_id), version, _version_timeout())
+
+
+def on_schema_change(department_id):
+    transaction.on_commit(partial(publish_schema_version, department_id))
+
+
+def bump_schema_version(department_id):
+    Department.objects.filter(id=department_id).update(schema_version=F('schema_version') + 1)
+    on_schema_change(department_id)
+
+
+def current_schema_version(department_id):
+    version = cache.get(_version_key(department_id))
+    if version is None:
+        version = Department.objects.filter(id=department_id).values_list('schema_version', flat=True).first()
+        if version is not None:
+            # add() never overwrites a version published by a concurrent writer.
+            cache.add(_version_key(department_id), version, _version_timeout())
+    return version
+
+
+def schema_etag(department_id, version):
+    return f'"schema-{department_id}-{version}"'
+
+
+def get_cached_schema(department_id, version, build):
+    key = (department_id, version)
+    with _local_lock:
+        payload = _local_schemas.get(key)
+        if payload is not None:
+            _local_schemas.move_to_end(key)
+            return payload
+
+    payload = cache.get(_schema_key(department_id, version))
+    if payload is None:
+        payload = build()
+        cache.set(_schema_key(department_id, version), payload, SCHEMA_CACHE_TIMEOUT)
+
+    with _local_lock:
+        _local_schemas[key] = payload
+        while len(_local_schemas) > LOCAL_CACHE_SIZE:
+            _local_schemas.popitem(last=False)
+    return payload
+
+
+def clear_local_schemas():
+    with _local_lock:
+        _local_schemas.clear()
@@ -0,0 +1,85 @@
+from django.db import transaction
+from .counters import record_fields
+from .documents import sync_employees
+from .models import DynamicField, EmployeeFieldData
+from .typed_values import refresh_typed_values
+
+FIELD_ATTRS = ('label', 'field_type', 'field_options', 'order')
+
+
+class SchemaDiffError(ValueError):
+    pass
+
+
+class FieldDiff:
+
+    def __init__(self, department):
+        self.department = department
+        self.creates = []
+        self.updates = []
+        self.update_attrs = set()
+        self.retyped = []
+        self.deletes = []
+
+    def __bool__(self):
+        return bool(self.creates or self.updates or self.deletes)
+
+    def summary(self):
+        return {
+            'created': [field.id for field in self.creates],
+            'updated': [field.id for field in self.updates],
+            'deleted': [field.id for field in self.deletes],
+        }
+
+
+def diff_fields(department, submitted, delete_missing=False, delete_ids=()):
+    existing = {field.id: field for field in DynamicField.objects.filter(department=department)}
+    diff = FieldDiff(department)
+    delete_ids = {int(field_id) for field_id in delete_ids if str(field_id).isdigit()}
+    seen = set()
+
+    for index, data in enumerate(submitted):
+        field = existing.get(data.get('id'))
+        if field is None or field.id in delete_ids:
+            if not data.get('label') or not data.get('field_type'):
+                raise SchemaDiffError(f'Field {index + 1} needs a label and field_type')
+            diff.creates.append(DynamicField(
+                department=department,
+                label=data['label'],
+                field_type=data['field_type'],
+                field_options=data.get('field_options'),
+                order=data.get('order', index),
+            ))
+            continue
+
+        seen.add(field.id)
+        changed = [attr for attr in FIELD_ATTRS if attr in data and getattr(field, attr) != data[attr]]
+        for attr in changed:
+            setattr(field, attr, data[attr])
+        if changed:
+            diff.updates.append(field)
+            diff.update_attrs.update(changed)
+        if 'field_type' in changed:
+            diff.retyped.append(field.id)
+
+    for field_id, field in existing.items():
+        if field_id in delete_ids or (delete_missing and field_id not in seen):
+            diff.deletes.append(field)
+    return diff
+
+
+@transaction.atomic
+def apply_field_diff(diff):
+    department_id = diff.department.id
+    if diff.creates:
+        DynamicField.objects.bulk_create(diff.creates)
+    if diff.updates:
+        DynamicField.objects.bulk_update(diff.updates, sorted(diff.update_attrs))
+        if diff.retyped:
+            refresh_typed_values(EmployeeFieldData.objects.filter(field_id__in=diff.retyped))
+    if diff.deletes:
+        DynamicField.objects.filter(id__in=[field.id for field in diff.deletes]).delete()
+        sync_employees(diff.department.employees.all())
+    if diff:
+        record_fields(department_id, len(diff.creates) - len(diff.deletes))
+    return diff.summary()
@@ -0,0 +1,37 @@
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity
+from django.db.models import F, Func, OuterRef, Q, QuerySet, Subquery, TextField, Value
+from django.db.models.functions import Coalesce, Lower
+from .models import Employee, EmployeeFieldData
+
+SEARCH_CONFIG = 'simple'
+
+
+class JSONText(Func):
+    # Unwraps a jsonb scalar to plain text ("abc" -> abc, true -> true).
+    template = "(%(expressions)s #>> '{}')"
+    output_field = TextField()
+
+
+def refresh_search_index(employees):
+    if not isinstance(employees, QuerySet):
+        employees = Employee.objects.filter(id__in=list(employees))
+
+    document = (EmployeeFieldData.objects.filter(employee=OuterRef('pk'))
+                .order_by().values('employee')
+                .annotate(doc=StringAgg(JSONText('value'), delimiter=' '))
+                .values('doc'))
+    employees.update(search_document=Lower(Coalesce(Subquery(document), Value(''))))
+    employees.update(search_vector=SearchVector('search_document', config=SEARCH_CONFIG))
+
+
+def search_employees(queryset, value):
+    term = value.strip().lower()
+    if not term:
+        return queryset
+
+    query = SearchQuery(term, config=SEARCH_CONFIG, search_type='websearch')
+    return (queryset
+            .filter(Q(search_vector=query) | Q(search_document__contains=term))
+            .annotate(search_rank=SearchRank(F('search_vector'), query) + TrigramWordSimilarity(term, 'search_document'))
+            .order_by('-search_rank', 'id'))
@@ -1,21 +1,30 @@
 from rest_framework import serializers
+from django.db import transaction
 from .models import Department, DynamicField, Employee, EmployeeFieldData
+from .counters import record_employees
+from .services import create_employee, update_employee_values
+from .validation import get_compiled_schema
+from Main.instrumentation import InstrumentedSerializerMixin
 
-class DepartmentSerializer(serializers.ModelSerializer):
-    total_employees = serializers.SerializerMethodField()
+class DepartmentSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
+    total_employees = serializers.IntegerField(source='employee_count', read_only=True)
     class Meta:
         model = Department
         fields = ['id', 'name', 'label', 'created_by', 'created_at', 'updated_at', 'total_employees']
         read_only_fields = ['id', 'created_by', 'created_at', 'updated_at', 'total_employees']
-        
-    def get_total_employees(self, obj):
-        return Employee.objects.filter(department=obj).count()
 
 class DynamicFieldSerializer(serializers.ModelSerializer):
     class Meta:
         model = DynamicField
         fields = ['id', 'department', 'label', 'field_type', 'field_options', 'order']
 
+class DynamicFieldInputSerializer(serializers.Serializer):
+    id = serializers.IntegerField(required=False, allow_null=True)
+    label = serializers.CharField(max_length=100, required=False)
+    field_type = serializers.ChoiceField(choices=DynamicField.FIELD_TYPES, required=False)
+    field_options = serializers.JSONField(required=False, allow_null=True)
+    order = serializers.IntegerField(min_value=0, required=False)
+
 class DepartmentFieldSerializer(serializers.ModelSerializer):
     fields = DynamicFieldSerializer(many=True)
 
@@ -23,14 +32,14 @@ class DepartmentFieldSerializer(serializers.ModelSerializer):
         model = Department
         fields = ['id', 'fields']
         
-class DepartmentFormSerializer(serializers.ModelSerializer):
+class DepartmentFormSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
     fields = DynamicFieldSerializer(many=True, read_only=True)
 
     class Meta:
         model = Department
         fields = ['id', 'name', 'fields']
 
-class FormStructureSerializer(serializers.ModelSerializer):
+class FormStructureSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
     fields = DynamicFieldSerializer(many=True, read_only=True)
     
     class Meta:
@@ -47,33 +56,13 @@ class FormStructureSerializer(serializers.ModelSerializer):
         }
 
 class EmployeeFieldDataSerializer(serializers.ModelSerializer):
-    field = serializers.PrimaryKeyRelatedField(queryset=DynamicField.objects.all())
+    # Resolved against the department's fields in EmployeeCreateSerializer.validate.
+    field = serializers.IntegerField()
 
     class Meta:
         model = EmployeeFieldData
         fields = ['field', 'value']
 
-    def validate(self, data):
-        field = data['field']
-        value = data['value']
-
-        if field.field_type == 'number':
-            try:
-                float(value)
-            except (ValueError, TypeError):
-                raise serializers.ValidationError(f"Value for {field.label} must be a number.")
-        elif field.field_type == 'email':
-            if '@' not in str(value) or '.' not in str(value):
-                raise serializers.ValidationError(f"Value for {field.label} must be a valid email.")
-        elif field.field_type == 'boolean':
-            if not isinstance(value, bool):
-                raise serializers.ValidationError(f"Value for {field.label} must be a boolean.")
-        elif field.field_type == 'select':
-            choices = field.field_options.get('choices', []) if field.field_options else []
-            if value not in choices:
-                raise serializers.ValidationError(f"Value for {field.label} must be one of: {choices}")
-        return data
-
 class EmployeeCreateSerializer(serializers.ModelSerializer):
     field_data = EmployeeFieldDataSerializer(many=True)
 
@@ -85,59 +74,82 @@ class EmployeeCreateSerializer(serializers.ModelSerializer):
         department = data.get('department')
         field_data = data.get('field_data', [])
         
-        department_fields = DynamicField.objects.filter(department=department)
-        required_fields = set(department_fields.values_list('id', flat=True))
-        provided_fields = set(fd['field'].id for fd in field_data)
-        
-        missing_fields = required_fields - provided_fields
-        if missing_fields:
-            missing_labels = DynamicField.objects.filter(id__in=missing_fields).values_list('label', flat=True)
+        schema = get_compiled_schema(department)
+
+        cleaned, errors = schema.validate((fd['field'], fd['value']) for fd in field_data)
+        if errors:
+            raise serializers.ValidationError(errors)
+
+        missing_labels = schema.missing_labels(cleaned)
+        if missing_labels:
             raise serializers.ValidationError(f"Missing required fields: {', '.join(missing_labels)}")
         
+        data['field_data'] = [{'field': schema.fields[field_id], 'value': value} for field_id, value in cleaned.items()]
         return data
 
     def create(self, validated_data):
         field_data = validated_data.pop('field_data')
-        employee = Employee.objects.create(**validated_data)
-        
-        for data in field_data:
-            field = data['field']
-            value = data['value']
-            EmployeeFieldData.objects.create(employee=employee, field=field, value=value)
-        
-        return employee
+        return create_employee(validated_data['department'], [(data['field'].id, data['value']) for data in field_data])
     
+    @transaction.atomic
     def update(self, instance, validated_data):
         field_data = validated_data.pop('field_data', [])
+        previous_department_id = instance.department_id
         instance.department = validated_data.get('department', instance.department)
-        instance.save()
+        if instance.department_id != previous_department_id:
+            instance.save(update_fields=['department'])
+            record_employees(previous_department_id, -1)
+            record_employees(instance.department_id, 1)
 
-        EmployeeFieldData.objects.filter(employee=instance).delete()
-        
-        for data in field_data:
-            field = data['field']
-            value = data['value']
-            EmployeeFieldData.objects.create(employee=instance, field=field, value=value)
-        
+        self.changed_count = update_employee_values(
+            instance, [(data['field'].id, data['value']) for data in field_data], prune=True)
         return instance
     
-class EmployeeSerializer(serializers.ModelSerializer):
+class EmployeeListSerializer(InstrumentedSerializerMixin, serializers.ListSerializer):
+
+    def to_representation(self, data):
+        employees = list(data.all() if hasattr(data, 'all') else data)
+        department_ids = {employee.department_id for employee in employees}
+
+        fields_by_department = {department_id: [] for department_id in department_ids}
+        for field in DynamicField.objects.filter(department_id__in=department_ids).order_by('order', 'id'):
+            fields_by_department[field.department_id].append(field)
+        self.context['fields_by_department'] = fields_by_department
+
+        # Employees written before the document column existed still read from EmployeeFieldData.
+        missing = [employee for employee in employees if not employee.document]
+        if missing:
+            documents = {}
+            for employee_id, field_id, value in (EmployeeFieldData.objects
+                                                 .filter(employee__in=missing)
+                                                 .values_list('employee_id', 'field_id', 'value')):
+                documents.setdefault(employee_id, {})[str(field_id)] = value
+            for employee in missing:
+                employee.document = documents.get(employee.id, {})
+
+        return [self.child.to_representation(employee) for employee in employees]
+
+class EmployeeSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
     field_data = serializers.SerializerMethodField()
 
     class Meta:
         model = Employee
         fields = ['id', 'department', 'field_data', 'created_at']
+        list_serializer_class = EmployeeListSerializer
 
     def get_field_data(self, obj):
-        field_data = EmployeeFieldData.objects.filter(employee=obj)
+        fields = self.context.get('fields_by_department', {}).get(obj.department_id)
+        if fields is None:
+            fields = DynamicField.objects.filter(department_id=obj.department_id).order_by('order', 'id')
+        document = obj.document or {}
         return {
-            fd.field.label: {
-                'value': fd.value,
-                'field_type': fd.field.field_type,
-                'field_id': fd.field.id
-            } for fd in field_data }
+            field.label: {
+                'value': document[str(field.id)],
+                'field_type': field.field_type,
+                'field_id': field.id
+            } for field in fields if str(field.id) in document }
         
-class DepartmentsNoFormSerializer(serializers.ModelSerializer):
+class DepartmentsNoFormSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Department
         fields = ['id', 'name', 'label']
\ No newline at end of file
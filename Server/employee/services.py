@@ -0,0 +1,50 @@
+from django.db import transaction
+from .counters import record_employees, touch
+from .documents import build_document
+from .models import Employee, EmployeeFieldData
+from .search import refresh_search_index
+from .typed_values import TYPED_COLUMNS, build_field_data
+from .validation import get_compiled_schema
+
+
+@transaction.atomic
+def create_employee(department, values):
+    values = list(values)
+    fields = get_compiled_schema(department).fields
+    employee = Employee.objects.create(department=department, document=build_document(values))
+    EmployeeFieldData.objects.bulk_create([
+        build_field_data(employee, fields[field_id], value)
+        for field_id, value in values
+    ])
+    refresh_search_index([employee.id])
+    record_employees(department.id, 1)
+    return employee
+
+
+@transaction.atomic
+def update_employee_values(employee, values, prune=False):
+    values = dict(values)
+    fields = get_compiled_schema(employee.department).fields
+    existing = dict(EmployeeFieldData.objects.filter(employee=employee).values_list('field_id', 'value'))
+
+    changed = [
+        build_field_data(employee, fields[field_id], value)
+        for field_id, value in values.items()
+        if field_id not in existing or existing[field_id] != value
+    ]
+    stale = [field_id for field_id in existing if field_id not in values] if prune else []
+
+    if changed:
+        EmployeeFieldData.objects.bulk_create(
+            changed, update_conflicts=True, unique_fields=['employee', 'field'], update_fields=['value', *TYPED_COLUMNS])
+    if stale:
+        EmployeeFieldData.objects.filter(employee=employee, field_id__in=stale).delete()
+
+    if changed or stale:
+        document = {} if prune else dict(employee.document or {})
+        document.update(build_document(values.items()))
+        employee.document = document
+        employee.save(update_fields=['document'])
+        refresh_search_index([employee.id])
+        touch(employee.department_id)
+    return len(changed) + len(stale)
@@ -1,3 +1,544 @@
-from django.test import TestCase
+import csv
+import hashlib
+import io
+import json
+import time
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from authCustom.user_cache import clear_user_cache
+from home.sessions import clear_local_sessions
+from Main.instrumentation import view_budget
+from .counters import record_employees
+from .models import Department, Employee
+from .query import compile_filter
+from .rollups import headcount_series, rebuild_rollups
+from .schema_cache import LOCAL_VERSION_TIMEOUT, clear_local_schemas
+from .search import search_employees
+from .schema_diff import SchemaDiffError, apply_field_diff, diff_fields
+from .services import create_employee, update_employee_values
+from .urls import urlpatterns
 
-# Create your tests here.
+User = get_user_model()
+
+SEED_SIZES = {'empty': 0, 'small': 3, 'large': 40}
+SEED_FIELDS = [
+    {'label': 'Name', 'field_type': 'text', 'order': 0},
+    {'label': 'Salary', 'field_type': 'number', 'order': 1},
+    {'label': 'Start date', 'field_type': 'date', 'order': 2},
+    {'label': 'Office', 'field_type': 'select', 'field_options': {'choices': ['HQ', 'Remote']}, 'order': 3},
+    {'label': 'Manager', 'field_type': 'boolean', 'order': 4},
+]
+
+
+def seed_department(user, name, size):
+    department = Department.objects.create(name=name, label=name.title(), created_by=user)
+    apply_field_diff(diff_fields(department, SEED_FIELDS))
+    department.refresh_from_db()
+    fields = {field.label: field.id for field in department.fields.all()}
+    for index in range(size):
+        create_employee(department, [
+            (fields['Name'], f'{name} employee {index}'),
+            (fields['Salary'], 1000 + index * 10),
+            (fields['Start date'], f'2024-{index % 12 + 1:02d}-01'),
+            (fields['Office'], 'HQ' if index % 2 else 'Remote'),
+            (fields['Manager'], index % 5 == 0),
+        ])
+    department.refresh_from_db()
+    return department
+
+
+def employee_values(department):
+    fields = {field.label: field.id for field in department.fields.all()}
+    return [
+        {'field': fields['Name'], 'value': 'New hire'},
+        {'field': fields['Salary'], 'value': 1234},
+        {'field': fields['Start date'], 'value': '2025-03-01'},
+        {'field': fields['Office'], 'value': 'HQ'},
+        {'field': fields['Manager'], 'value': False},
+    ]
+
+
+class QueryBudgetTestMixin:
+    # Budgets are enforced by RequestInstrumentationMiddleware, so any request over budget raises.
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='budget', email='budget@example.com', password='Budget-pass1')
+        cls.departments = {label: seed_department(cls.user, label, size) for label, size in SEED_SIZES.items()}
+
+    def reset_caches(self):
+        cache.clear()
+        clear_local_schemas()
+        clear_local_sessions()
+        clear_user_cache()
+
+    def request(self, method, url, expected_status=None, **kwargs):
+        # Budgets cover a cold worker, so every measured request starts with empty caches.
+        self.reset_caches()
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(url, **kwargs)
+            if response.streaming:
+                # Exports run their queries while the body is consumed.
+                response.body = b''.join(response.streaming_content)
+        if expected_status is None:
+            self.assertLess(response.status_code, 400, getattr(response, 'data', response))
+        else:
+            self.assertEqual(response.status_code, expected_status, getattr(response, 'data', response))
+        return response, len(queries)
+
+    def department_request(self, name, department, data):
+        return reverse(name, args=[department.id]), data
+
+    def assert_constant_queries(self, name, data=None):
+        counts = {}
+        for label in ('small', 'large'):
+            url, params = self.department_request(name, self.departments[label], data or {})
+            _, counts[label] = self.request('get', url, data=params)
+        self.assertEqual(counts['small'], counts['large'], f'{name} query count grows with department size')
+
+
+class QueryBudgetDeclarationTests(TestCase):
+    def test_every_employee_route_declares_a_budget(self):
+        for pattern in urlpatterns:
+            view_class = getattr(pattern.callback, 'view_class', None)
+            methods = [method for method in view_class.http_method_names
+                       if method != 'options' and hasattr(view_class, method)]
+            for method in methods:
+                with self.subTest(route=str(pattern.pattern), method=method):
+                    self.assertIsNotNone(view_budget(pattern.callback, method))
+
+
+@override_settings(QUERY_BUDGET_ENFORCE=True)
+class EmployeeApiQueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.cookies['access_token'] = str(AccessToken.for_user(self.user))
+
+    def test_department_reads(self):
+        self.request('get', reverse('department-list'))
+        self.request('get', reverse('no-form-departments'))
+        for department in self.departments.values():
+            self.request('get', reverse('department-detail', args=[department.id]))
+            self.request('get', reverse('form-structure', args=[department.id]))
+
+    def test_department_writes(self):
+        self.request('post', reverse('department-list'), data={'name': 'ops', 'label': 'Ops'}, format='json')
+        for department in self.departments.values():
+            self.request('put', reverse('department-detail', args=[department.id]),
+                         data={'label': 'Renamed'}, format='json')
+        for department in self.departments.values():
+            self.request('delete', reverse('department-detail', args=[department.id]))
+
+    def test_form_writes(self):
+        department = Department.objects.create(name='fresh', label='Fresh', created_by=self.user)
+        self.request('post', reverse('form-creation'),
+                     data={'department': department.id, 'fields': SEED_FIELDS}, format='json')
+        for department in self.departments.values():
+            fields = [{'id': field.id, 'label': field.label, 'field_type': field.field_type, 'order': field.order}
+                      for field in department.fields.exclude(label='Manager')]
+            fields.append({'label': 'Team', 'field_type': 'text', 'order': 9})
+            self.request('put', reverse('form-update', args=[department.id]), data={'fields': fields}, format='json')
+
+    def test_employee_list_is_independent_of_size(self):
+        self.assert_constant_queries('employee-list')
+        self.assert_constant_queries('employee-list', data={'page_size': 50})
+        self.assert_constant_queries('employee-list', data={'search': 'employee'})
+        self.assert_constant_queries('employee-list', data={'pagination': 'cursor', 'count': 'exact'})
+
+    def test_employee_list_filter_and_ordering(self):
+        for department in self.departments.values():
+            salary = department.fields.get(label='Salary').id
+            predicate = json.dumps([{'field': salary, 'op': 'range', 'value': {'gte': 1000}}])
+            self.request('get', reverse('employee-list', args=[department.id]),
+                         data={'filter': predicate, 'ordering': f'-{salary}'})
+
+    def test_employee_detail(self):
+        for department in self.departments.values():
+            employee = department.employees.first()
+            if employee is not None:
+                self.request('get', reverse('employee-detail', args=[employee.id]))
+
+    def test_employee_writes(self):
+        for department in self.departments.values():
+            response, _ = self.request('post', reverse('employee-create'), format='json',
+                                       data={'department': department.id, 'field_data': employee_values(department)})
+            employee_id = response.data['data']['id']
+            values = employee_values(department)
+            values[0]['value'] = 'Renamed hire'
+            self.request('put', reverse('employee-list', args=[employee_id]), format='json',
+                         data={'department': department.id, 'field_data': values})
+            self.request('delete', reverse('employee-list', args=[employee_id]))
+
+    def test_employee_import(self):
+        for department in self.departments.values():
+            upload = SimpleUploadedFile('employees.csv', b'Name,Salary,Start date,Office,Manager\n'
+                                                         b'Imported one,2000,2025-01-01,HQ,true\n'
+                                                         b'Imported two,2100,2025-02-01,Remote,false\n',
+                                        content_type='text/csv')
+            self.request('post', reverse('employee-import', args=[department.id]), data={'file': upload})
+
+    def test_employee_export(self):
+        self.assert_constant_queries('employee-export')
+        self.assert_constant_queries('employee-export', data={'file_format': 'ndjson'})
+
+    def test_analytics_and_facets(self):
+        self.assert_constant_queries('employee-analytics', data={'cache': '0'})
+        self.assert_constant_queries('employee-facets', data={'cache': '0'})
+        for department in self.departments.values():
+            start_date = department.fields.get(label='Start date').id
+            self.request('get', reverse('employee-analytics', args=[department.id]),
+                         data={'histogram': start_date, 'interval': 'month', 'cache': '0'})
+
+    def test_analytics_rejects_a_non_numeric_histogram(self):
+        department = self.departments['small']
+        response = self.client.get(reverse('employee-analytics', args=[department.id]), data={'histogram': 'abc'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['error'], 'histogram must be a date field id')
+
+    def test_headcount_series(self):
+        self.assert_constant_queries('employee-headcount')
+        self.assert_constant_queries('employee-headcount', data={'period': 'day', 'start': '2024-01-01'})
+
+
+class SchemaEtagTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='etag', email='etag@example.com', password='Etag-pass1')
+        cls.department = seed_department(cls.user, 'etag', 0)
+
+    def setUp(self):
+        cache.clear()
+        clear_local_schemas()
+        self.client = APIClient()
+        self.client.cookies['access_token'] = str(AccessToken.for_user(self.user))
+        self.url = reverse('form-structure', args=[self.department.id])
+
+    def add_field(self):
+        fields = [{'id': field.id, 'label': field.label, 'field_type': field.field_type, 'order': field.order}
+                  for field in self.department.fields.all()]
+        fields.append({'label': 'Team', 'field_type': 'text', 'order': 9})
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(reverse('form-update', args=[self.department.id]),
+                                       data={'fields': fields}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_schema_change_returns_new_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.add_field()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertIn('Team', [field['label'] for field in response.data['fields']])
+
+    def test_local_cache_expires_versions_published_elsewhere(self):
+        etag = self.client.get(self.url)['ETag']
+        # Another worker's publish never reaches this process-local cache.
+        Department.objects.filter(id=self.department.id).update(schema_version=self.department.schema_version + 1)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        later = time.time() + LOCAL_VERSION_TIMEOUT + 1
+        with mock.patch('django.core.cache.backends.locmem.time.time', return_value=later):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class RebuildRollupsTests(TestCase):
+    def test_rebuild_does_not_subtract_deletions_twice(self):
+        user = User.objects.create_user(username='rollups', email='rollups@example.com', password='Rollups-pass1')
+        department = seed_department(user, 'rollups', 12)
+        employee = department.employees.first()
+        employee.delete()
+        record_employees(department.id, -1)
+        for period in ('day', 'month'):
+            self.assertEqual(headcount_series(department, period)[-1]['headcount'], 11)
+
+        rebuild_rollups(Department.objects.filter(id=department.id))
+        for period in ('day', 'month'):
+            series = headcount_series(department, period)
+            self.assertEqual(series[-1]['headcount'], 11)
+            self.assertEqual(sum(bucket['deleted'] for bucket in series), 0)
+
+
+class EmployeeFilterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='filters', email='filters@example.com', password='Filters-pass1')
+        cls.department = seed_department(cls.user, 'filters', 6)
+        cls.fields = {field.label: field.id for field in cls.department.fields.all()}
+        cls.seeded = list(cls.department.employees.order_by('id').values_list('id', flat=True))
+        cls.partial = create_employee(cls.department, [(cls.fields['Name'], 'Partial hire')]).id
+
+    def matches(self, *predicates):
+        predicates = [{**predicate, 'field': self.fields[predicate['field']]} for predicate in predicates]
+        queryset = Employee.objects.filter(department=self.department)
+        return set(queryset.filter(compile_filter(self.department.id, json.dumps(predicates))).values_list('id', flat=True))
+
+    def employees(self, *indexes):
+        return {self.seeded[index] for index in indexes}
+
+    def test_eq(self):
+        self.assertEqual(self.matches({'field': 'Office', 'op': 'eq', 'value': 'HQ'}), self.employees(1, 3, 5))
+        self.assertEqual(self.matches({'field': 'Salary', 'value': 1020}), self.employees(2))
+
+    def test_in(self):
+        self.assertEqual(self.matches({'field': 'Office', 'op': 'in', 'value': ['HQ', 'Remote']}), self.employees(*range(6)))
+        self.assertEqual(self.matches({'field': 'Salary', 'op': 'in', 'value': [1000, 1050]}), self.employees(0, 5))
+
+    def test_range(self):
+        self.assertEqual(self.matches({'field': 'Salary', 'op': 'range', 'value': {'gte': 1010, 'lt': 1040}}),
+                         self.employees(1, 2, 3))
+        self.assertEqual(self.matches({'field': 'Start date', 'op': 'range', 'value': {'gte': '2024-03-01', 'lte': '2024-05-01'}}),
+                         self.employees(2, 3, 4))
+
+    def test_prefix(self):
+        self.assertEqual(self.matches({'field': 'Name', 'op': 'prefix', 'value': 'filters employee 1'}), self.employees(1))
+        self.assertEqual(self.matches({'field': 'Name', 'op': 'prefix', 'value': 'Partial'}), {self.partial})
+
+    def test_is_null(self):
+        self.assertEqual(self.matches({'field': 'Salary', 'op': 'is_null', 'value': True}), {self.partial})
+        self.assertEqual(self.matches({'field': 'Salary', 'op': 'is_null', 'value': False}), self.employees(*range(6)))
+
+    def test_boolean(self):
+        self.assertEqual(self.matches({'field': 'Manager', 'op': 'boolean', 'value': True}), self.employees(0, 5))
+        self.assertEqual(self.matches({'field': 'Manager', 'op': 'boolean', 'value': False}), self.employees(1, 2, 3, 4))
+
+    def test_predicates_are_combined(self):
+        self.assertEqual(self.matches({'field': 'Office', 'value': 'HQ'},
+                                      {'field': 'Salary', 'op': 'range', 'value': {'gte': 1030}}), self.employees(3, 5))
+
+    def test_long_text_values_are_stored_and_filtered(self):
+        apply_field_diff(diff_fields(self.department, [{'label': 'Notes', 'field_type': 'textarea', 'order': 9}]))
+        self.department.refresh_from_db()
+        notes = self.department.fields.get(label='Notes').id
+        self.fields['Notes'] = notes
+        # Hex digests barely compress, so the value stays far over the B-tree entry limit.
+        long_note = ''.join(hashlib.sha256(str(index).encode()).hexdigest() for index in range(150))
+        employee = create_employee(self.department, [(notes, long_note + ' first')])
+        update_employee_values(employee, [(notes, long_note + ' second')])
+
+        self.assertEqual(self.matches({'field': 'Notes', 'value': long_note + ' second'}), {employee.id})
+        self.assertEqual(self.matches({'field': 'Notes', 'value': long_note + ' first'}), set())
+        self.assertEqual(self.matches({'field': 'Notes', 'op': 'prefix', 'value': long_note + ' sec'}), {employee.id})
+
+    def test_invalid_predicates_return_400(self):
+        other = seed_department(self.user, 'other', 0).fields.get(label='Name').id
+        client = APIClient()
+        client.cookies['access_token'] = str(AccessToken.for_user(self.user))
+        invalid = [
+            'not json',
+            json.dumps({'field': 'Salary', 'value': 1}),
+            json.dumps([{'field': self.fields['Salary'], 'op': 'like', 'value': 1}]),
+            json.dumps([{'field': self.fields['Salary'], 'value': 'lots'}]),
+            json.dumps([{'field': self.fields['Salary'], 'op': 'prefix', 'value': '1'}]),
+            json.dumps([{'field': self.fields['Name'], 'op': 'range', 'value': {'gte': 'a'}}]),
+            json.dumps([{'field': self.fields['Salary'], 'op': 'range', 'value': {'between': 1}}]),
+            json.dumps([{'field': self.fields['Office'], 'op': 'in', 'value': []}]),
+            json.dumps([{'field': self.fields['Name'], 'op': 'boolean', 'value': True}]),
+            json.dumps([{'field': self.fields['Manager'], 'op': 'boolean', 'value': 'yes'}]),
+            json.dumps([{'field': self.fields['Start date'], 'value': '01/02/2024'}]),
+            json.dumps([{'field': other, 'value': 'x'}]),
+        ]
+        for predicate in invalid:
+            with self.subTest(predicate=predicate):
+                response = client.get(reverse('employee-list', args=[self.department.id]), data={'filter': predicate})
+                self.assertEqual(response.status_code, 400)
+
+
+class SchemaDiffTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='schema', email='schema@example.com', password='Schema-pass1')
+        cls.department = seed_department(cls.user, 'schema', 2)
+
+    def submitted(self, **changes):
+        fields = []
+        for field in self.department.fields.order_by('order'):
+            data = {'id': field.id, 'label': field.label, 'field_type': field.field_type,
+                    'field_options': field.field_options, 'order': field.order}
+            fields.append({**data, **changes.get(field.label, {})})
+        return fields
+
+    def apply(self, submitted, **kwargs):
+        before = Department.objects.get(id=self.department.id)
+        summary = apply_field_diff(diff_fields(self.department, submitted, **kwargs))
+        return before, Department.objects.get(id=self.department.id), summary
+
+    def test_first_form_sets_has_form(self):
+        department = Department.objects.create(name='blank', label='Blank', created_by=self.user)
+        self.assertFalse(department.has_form)
+        summary = apply_field_diff(diff_fields(department, SEED_FIELDS))
+        department.refresh_from_db()
+        self.assertEqual(len(summary['created']), len(SEED_FIELDS))
+        self.assertEqual((department.has_form, department.field_count), (True, len(SEED_FIELDS)))
+        self.assertEqual(department.schema_version, 2)
+
+    def test_create_update_and_delete_counts(self):
+        submitted = [field for field in self.submitted(Salary={'label': 'Pay'}) if field['label'] != 'Manager']
+        submitted.append({'label': 'Team', 'field_type': 'text', 'order': 9})
+        before, after, summary = self.apply(submitted, delete_missing=True)
+
+        self.assertEqual({key: len(ids) for key, ids in summary.items()}, {'created': 1, 'updated': 1, 'deleted': 1})
+        self.assertEqual(sorted(self.department.fields.values_list('label', flat=True)),
+                         ['Name', 'Office', 'Pay', 'Start date', 'Team'])
+        self.assertEqual(after.field_count, before.field_count)
+        self.assertTrue(after.has_form)
+        self.assertEqual(after.schema_version, before.schema_version + 1)
+        self.assertEqual(after.data_version, before.data_version + 1)
+
+    def test_unchanged_submission_is_a_no_op(self):
+        before, after, summary = self.apply(self.submitted())
+        self.assertEqual(summary, {'created': [], 'updated': [], 'deleted': []})
+        self.assertEqual((after.schema_version, after.data_version), (before.schema_version, before.data_version))
+
+    def test_deleting_every_field_clears_has_form(self):
+        _, after, summary = self.apply([], delete_missing=True)
+        self.assertEqual(len(summary['deleted']), len(SEED_FIELDS))
+        self.assertEqual((after.has_form, after.field_count), (False, 0))
+
+    def test_missing_label_is_rejected(self):
+        with self.assertRaises(SchemaDiffError):
+            diff_fields(self.department, [{'field_type': 'text'}])
+
+    def test_invalid_field_rolls_back_the_whole_diff(self):
+        # The create is written first; the negative order then fails the update's CHECK constraint.
+        submitted = self.submitted(Salary={'label': 'Pay', 'order': -1})
+        submitted.append({'label': 'Team', 'field_type': 'text', 'order': 9})
+        before = Department.objects.get(id=self.department.id)
+        with self.assertRaises(IntegrityError):
+            apply_field_diff(diff_fields(self.department, submitted))
+
+        after = Department.objects.get(id=self.department.id)
+        self.assertFalse(self.department.fields.filter(label__in=['Team', 'Pay']).exists())
+        self.assertEqual((after.field_count, after.schema_version), (before.field_count, before.schema_version))
+
+
+class EmployeeSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='search', email='search@example.com', password='Search-pass1')
+        cls.department = seed_department(cls.user, 'search', 3)
+        name = cls.department.fields.get(label='Name').id
+        cls.exact = create_employee(cls.department, [(name, 'Dana Smith')]).id
+        cls.partial = create_employee(cls.department, [(name, 'Dana Smithson')]).id
+
+    def search(self, term):
+        return list(search_employees(self.department.employees.all(), term).values_list('id', flat=True))
+
+    def test_whole_words_rank_above_substrings(self):
+        self.assertEqual(self.search('Dana Smith'), [self.exact, self.partial])
+
+    def test_substring_match(self):
+        self.assertEqual(self.search('smithso'), [self.partial])
+
+    def test_no_match(self):
+        self.assertEqual(self.search('nobody'), [])
+
+    def test_search_through_the_api(self):
+        client = APIClient()
+        client.cookies['access_token'] = str(AccessToken.for_user(self.user))
+        response = client.get(reverse('employee-list', args=[self.department.id]), data={'search': 'dana smith'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['id'] for row in response.data['results']['data']], [self.exact, self.partial])
+
+
+class EmployeeImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='importer', email='importer@example.com', password='Import-pass1')
+        cls.department = seed_department(cls.user, 'importer', 0)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.cookies['access_token'] = str(AccessToken.for_user(self.user))
+
+    def upload(self, name, content, **params):
+        url = reverse('employee-import', args=[self.department.id])
+        if params:
+            url += '?' + '&'.join(f'{key}={value}' for key, value in params.items())
+        return self.client.post(url, data={'file': SimpleUploadedFile(name, content)})
+
+    def test_invalid_utf8_fails_only_its_row(self):
+        content = (b'\xef\xbb\xbfName,Salary,Start date,Office,Manager\n'
+                   b'First,2000,2025-01-01,HQ,true\n'
+                   b'Bad \xff,2100,2025-02-01,Remote,false\n'
+                   b'Third,2200,2025-03-01,Remote,false\n')
+        response = self.upload('employees.csv', content, batch_size=1)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['data']['created'], response.data['data']['failed']), (2, 1))
+        self.assertEqual(response.data['data']['errors'][0]['row'], 2)
+        self.assertTrue(response.data['data']['errors'][0]['error'].startswith('Invalid UTF-8'))
+
+    def test_invalid_utf8_in_ndjson(self):
+        content = (b'{"Name": "First", "Salary": 1, "Start date": "2025-01-01", "Office": "HQ", "Manager": true}\n'
+                   b'{"Name": "Bad \xff"}\n')
+        response = self.upload('employees.ndjson', content)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['data']['created'], response.data['data']['failed']), (1, 1))
+
+    def test_invalid_batch_size(self):
+        for batch_size in ('0', '-5', 'many'):
+            with self.subTest(batch_size=batch_size):
+                response = self.upload('employees.csv', b'Name\n', batch_size=batch_size)
+                self.assertEqual(response.status_code, 400)
+
+    def test_unknown_format(self):
+        response = self.upload('employees.txt', b'Name\n')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('file_format=csv', response.data['message'])
+
+
+class EmployeeExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='exporter', email='exporter@example.com', password='Export-pass1')
+        cls.department = seed_department(cls.user, 'exporter', 3)
+        cls.department.fields.filter(label='Name').update(order=9)
+        cls.fields = {field.label: field.id for field in cls.department.fields.all()}
+        cls.unique = create_employee(cls.department, [(cls.fields['Name'], 'Quinn Export')]).id
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.cookies['access_token'] = str(AccessToken.for_user(self.user))
+
+    def export(self, **params):
+        response = self.client.get(reverse('employee-export', args=[self.department.id]), data=params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def csv_rows(self, **params):
+        return list(csv.reader(io.StringIO(self.export(**params))))
+
+    def test_csv_header_follows_field_order(self):
+        rows = self.csv_rows()
+        self.assertEqual(rows[0], ['id', 'created_at', 'Salary', 'Start date', 'Office', 'Manager', 'Name'])
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[1][2:], ['1000', '2024-01-01', 'Remote', 'true', 'exporter employee 0'])
+
+    def test_columns_selection(self):
+        rows = self.csv_rows(columns=f"salary,{self.fields['Name']}")
+        self.assertEqual(rows[0], ['id', 'created_at', 'Salary', 'Name'])
+        self.assertEqual(rows[1][2:], ['1000', 'exporter employee 0'])
+
+    def test_search_filter(self):
+        rows = self.csv_rows(search='quinn')
+        self.assertEqual([row[0] for row in rows[1:]], [str(self.unique)])
+
+    def test_ndjson_shape(self):
+        lines = self.export(file_format='ndjson').splitlines()
+        self.assertEqual(len(lines), 4)
+        first = json.loads(lines[0])
+        self.assertEqual(set(first), {'id', 'created_at', 'field_data'})
+        self.assertEqual(list(first['field_data']), ['Salary', 'Start date', 'Office', 'Manager', 'Name'])
+        self.assertEqual((first['field_data']['Manager'], first['field_data']['Salary']), (True, 1000))
+        self.assertIsNone(json.loads(lines[-1])['field_data']['Salary'])
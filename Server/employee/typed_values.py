@@ -0,0 +1,64 @@
+import math
+from django.db.models.functions import Left
+from django.utils.dateparse import parse_date
+from .models import TEXT_KEY_LENGTH, EmployeeFieldData
+
+TYPED_COLUMNS = ('value_number', 'value_date', 'value_text', 'value_bool')
+TEXT_TYPES = frozenset({'text', 'email', 'select', 'textarea'})
+VALUE_COLUMNS = {
+    'number': 'value_number',
+    'date': 'value_date',
+    'boolean': 'value_bool',
+    **{field_type: 'value_text' for field_type in TEXT_TYPES},
+}
+
+
+def typed_columns(field_type, value):
+    columns = dict.fromkeys(TYPED_COLUMNS)
+    if value is None:
+        return columns
+
+    if field_type == 'number':
+        if not isinstance(value, bool):
+            try:
+                number = float(value)
+            except (TypeError, ValueError):
+                number = None
+            if number is not None and math.isfinite(number):
+                columns['value_number'] = number
+    elif field_type == 'date':
+        try:
+            columns['value_date'] = parse_date(str(value)[:10])
+        except ValueError:
+            pass
+    elif field_type == 'boolean':
+        if isinstance(value, bool):
+            columns['value_bool'] = value
+    elif field_type in TEXT_TYPES:
+        columns['value_text'] = value if isinstance(value, str) else str(value)
+    return columns
+
+
+def text_key(column='value_text'):
+    # Matches the expression in the value_text indexes, so lookups on it can use them.
+    return Left(column, TEXT_KEY_LENGTH)
+
+
+def build_field_data(employee, field, value):
+    return EmployeeFieldData(employee=employee, field=field, value=value, **typed_columns(field.field_type, value))
+
+
+def refresh_typed_values(queryset, batch_size=2000):
+    queryset = queryset.select_related('field').only('id', 'value', 'field', 'field__field_type').order_by('id')
+    last_id = 0
+    updated = 0
+    while True:
+        batch = list(queryset.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            return updated
+        for field_data in batch:
+            for column, typed in typed_columns(field_data.field.field_type, field_data.value).items():
+                setattr(field_data, column, typed)
+        EmployeeFieldData.objects.bulk_update(batch, TYPED_COLUMNS)
+        updated += len(batch)
+        last_id = batch[-1].id
@@ -10,5 +10,10 @@ urlpatterns = [
     path('employees-create/', EmployeeCreateView.as_view(), name='employee-create'),
     path('employees/<int:id>/', EmployeeListView.as_view(), name='employee-list'),
     path('employees/detail/<int:employee_id>/', EmployeeDetailView.as_view(), name='employee-detail'),
+    path('employees/import/<int:id>/', EmployeeImportView.as_view(), name='employee-import'),
+    path('employees/export/<int:id>/', EmployeeExportView.as_view(), name='employee-export'),
+    path('employees/analytics/<int:id>/', EmployeeAnalyticsView.as_view(), name='employee-analytics'),
+    path('employees/facets/<int:id>/', EmployeeFacetsView.as_view(), name='employee-facets'),
+    path('employees/headcount/<int:id>/', HeadcountSeriesView.as_view(), name='employee-headcount'),
     path('departments-noform/', DepartmentsNoForm.as_view(), name='no-form-departments'),
 ]
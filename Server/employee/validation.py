@@ -0,0 +1,145 @@
+import math
+import threading
+from collections import OrderedDict
+from collections.abc import Hashable
+from rest_framework import serializers
+from .models import DynamicField
+
+COMPILED_SCHEMA_CACHE_SIZE = 128
+
+TRUE_STRINGS = frozenset({'true', '1', 'yes', 'on'})
+FALSE_STRINGS = frozenset({'false', '0', 'no', 'off', ''})
+
+
+def field_choices(field):
+    # Dashboard forms store a plain list, API forms store {"choices": [...]}.
+    options = field.field_options
+    if isinstance(options, dict):
+        options = options.get('choices', [])
+    return list(options or [])
+
+
+def _identity(value):
+    return value
+
+
+def compile_validator(field):
+    label = field.label
+    field_type = field.field_type
+
+    if field_type == 'number':
+        def validate(value):
+            try:
+                number = float(value)
+            except (ValueError, TypeError):
+                raise serializers.ValidationError(f"Value for {label} must be a number.")
+            # jsonb has no NaN or Infinity.
+            if not math.isfinite(number):
+                raise serializers.ValidationError(f"Value for {label} must be a finite number.")
+            return value
+    elif field_type == 'email':
+        def validate(value):
+            text = str(value)
+            if '@' not in text or '.' not in text:
+                raise serializers.ValidationError(f"Value for {label} must be a valid email.")
+            return value
+    elif field_type == 'boolean':
+        def validate(value):
+            if not isinstance(value, bool):
+                raise serializers.ValidationError(f"Value for {label} must be a boolean.")
+            return value
+    elif field_type == 'select':
+        choices_list = field_choices(field)
+        choices = frozenset(choice for choice in choices_list if isinstance(choice, Hashable))
+
+        def validate(value):
+            if not isinstance(value, Hashable) or value not in choices:
+                raise serializers.ValidationError(f"Value for {label} must be one of: {choices_list}")
+            return value
+    else:
+        validate = _identity
+    return validate
+
+
+def compile_coercer(field):
+    # Converts text input (CSV cells, form posts) into the JSON type the validator expects.
+    if field.field_type == 'boolean':
+        def coerce(raw):
+            lowered = raw.strip().lower()
+            if lowered in TRUE_STRINGS:
+                return True
+            if lowered in FALSE_STRINGS:
+                return False
+            return raw
+        return coerce
+    if field.field_type == 'number':
+        def coerce(raw):
+            try:
+                number = float(raw)
+            except ValueError:
+                return raw
+            if not math.isfinite(number):
+                return raw
+            return int(number) if number.is_integer() else number
+        return coerce
+    return _identity
+
+
+class CompiledSchema:
+
+    def __init__(self, department_id, version, fields):
+        self.department_id = department_id
+        self.version = version
+        self.fields = {field.id: field for field in fields}
+        self.ordered_fields = sorted(fields, key=lambda field: (field.order, field.id))
+        self.validators = {field.id: compile_validator(field) for field in fields}
+        self.coercers = {field.id: compile_coercer(field) for field in fields}
+        self.required = frozenset(self.fields)
+        self.by_key = {}
+        for field in fields:
+            self.by_key[str(field.id)] = field
+            self.by_key[field.label.strip().lower()] = field
+
+    def resolve(self, key):
+        return self.by_key.get(str(key).strip().lower())
+
+    def coerce(self, field_id, raw):
+        return self.coercers[field_id](raw)
+
+    def validate(self, values):
+        cleaned = {}
+        errors = []
+        for field_id, value in values:
+            validator = self.validators.get(field_id)
+            if validator is None:
+                errors.append(f"Field {field_id} does not belong to this department.")
+                continue
+            try:
+                cleaned[field_id] = validator(value)
+            except serializers.ValidationError as e:
+                errors.extend(str(detail) for detail in e.detail)
+        return cleaned, errors
+
+    def missing_labels(self, field_ids):
+        return [field.label for field in self.ordered_fields if field.id not in field_ids]
+
+
+_compiled = OrderedDict()
+_compiled_lock = threading.Lock()
+
+
+def get_compiled_schema(department):
+    key = (department.id, department.schema_version)
+    with _compiled_lock:
+        schema = _compiled.get(key)
+        if schema is not None:
+            _compiled.move_to_end(key)
+            return schema
+
+    schema = CompiledSchema(department.id, department.schema_version,
+                            list(DynamicField.objects.filter(department_id=department.id)))
+    with _compiled_lock:
+        _compiled[key] = schema
+        while len(_compiled) > COMPILED_SCHEMA_CACHE_SIZE:
+            _compiled.popitem(last=False)
+    return schema
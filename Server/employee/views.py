@@ -1,14 +1,29 @@
 from rest_framework.views import APIView
 from .models import Department, Employee, DynamicField
-from .serializers import (DepartmentSerializer, DynamicFieldSerializer, DepartmentFormSerializer,
+from .serializers import (DepartmentSerializer, DynamicFieldInputSerializer, DepartmentFormSerializer,
                           EmployeeCreateSerializer, EmployeeSerializer, DepartmentsNoFormSerializer)
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
-from .filters import DepartmentFilter,EmployeeFilter
+from .filters import DepartmentFilter,EmployeeFilter, EmployeeQueryError, filter_employees
 from django.shortcuts import get_object_or_404
-from .pagination import defaultPagination
+from .pagination import EmployeeCursorPagination, get_employee_paginator
+from .importer import EmployeeImporter, ImportFormatError, detect_format
+from .exporter import EXPORT_FORMATS, ExportColumnError, iter_export, select_fields
+from django.http import StreamingHttpResponse
+from django.utils.http import parse_etags
+from functools import partial
+from .schema_cache import bump_schema_version, current_schema_version, get_cached_schema, on_schema_change, schema_etag
+from .counters import record_employees
+from .schema_diff import SchemaDiffError, apply_field_diff, diff_fields
+from django.db import transaction
+from Main.instrumentation import query_budget
+from django.utils.dateparse import parse_date
+from .rollups import PERIODS, headcount_series
+from .analytics import (FACET_TYPES, analytics_cache_key, cached, date_histogram, field_facets, field_summary,
+                        parse_percentiles)
 
+@query_budget(get=2, post=2, put=6, delete=12)
 class DepartmentView(APIView):
 
     def get(self, request, id=None):
@@ -47,7 +62,9 @@ class DepartmentView(APIView):
             department = Department.objects.get(id=id)
             serializer = DepartmentSerializer(department, data=request.data, partial=True)
             if serializer.is_valid():
-                serializer.save()
+                with transaction.atomic():
+                    serializer.save()
+                    bump_schema_version(department.id)
                 return Response({'success': True, 'message': 'department updated', 'data': serializer.data}, status=status.HTTP_200_OK)
             return Response({'success': False, 'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
         except Department.DoesNotExist:
@@ -58,13 +75,16 @@ class DepartmentView(APIView):
     def delete(self, request, id):
         try:
             department = Department.objects.get(id=id)
-            department.delete()
+            with transaction.atomic():
+                department.delete()
+                on_schema_change(id)
             return Response({'success': True, 'message': 'department deleted'}, status=status.HTTP_200_OK)
         except Department.DoesNotExist:
             return Response({'success': False, 'message': 'department not found'}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
             return Response({'success': False, 'message': 'department deletion failed', 'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
+@query_budget(post=7)
 class DynamicFieldCreation(APIView):
     permission_classes = [IsAuthenticated]
     
@@ -73,38 +93,54 @@ class DynamicFieldCreation(APIView):
             department_id = request.data.get('department')
             fields_data = request.data.get('fields',[])
             department = Department.objects.get(id=department_id)
-            print(request.data)
-            for field_data in fields_data:
-                field_data['department'] = department.id
-                serializer = DynamicFieldSerializer(data=field_data)
-                if serializer.is_valid():
-                    serializer.save()
-                else:
-                    return Response({"success": False, "message": "form creation faild"}, status=status.HTTP_400_BAD_REQUEST)
+            serializer = DynamicFieldInputSerializer(data=fields_data, many=True)
+            if not serializer.is_valid():
+                return Response({"success": False, "message": "form creation faild", "error": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+            submitted = [{key: value for key, value in field.items() if key != 'id'} for field in serializer.validated_data]
+            try:
+                diff = apply_field_diff(diff_fields(department, submitted))
+            except SchemaDiffError as e:
+                return Response({"success": False, "message": "form creation faild", "error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
             return Response(
-                {"success": True, "message": "Form created successfully"}, status=status.HTTP_201_CREATED )
+                {"success": True, "message": "Form created successfully", "diff": diff}, status=status.HTTP_201_CREATED )
                     
         except Department.DoesNotExist:
             return Response({"error": "Department not found"}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
             return Response({'success': False, 'message': 'form creation faild', 'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
+@query_budget(get=4)
 class DepartmentFormStructure(APIView):
     permission_classes = [IsAuthenticated]
-    
-    def get(self, request, id):
-        try:
-            department = get_object_or_404(Department, id=id)
-            serializer = DepartmentFormSerializer(department)
-            return Response({
+
+    def build_schema(self, id):
+        department = get_object_or_404(Department, id=id)
+        serializer = DepartmentFormSerializer(department)
+        return {
             'department_id': department.id,
             'department_name': department.name,
             'department_label': department.label,
-            "fields": serializer.data['fields']}, status=status.HTTP_200_OK)
+            "fields": list(serializer.data['fields'])}
+    
+    def get(self, request, id):
+        try:
+            version = current_schema_version(id)
+            if version is None:
+                return Response({'success': False, 'message': 'department not found'}, status=status.HTTP_404_NOT_FOUND)
+
+            etag = schema_etag(id, version)
+            headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+            if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+            if etag in if_none_match or '*' in if_none_match:
+                return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+            schema = get_cached_schema(id, version, partial(self.build_schema, id))
+            return Response(schema, status=status.HTTP_200_OK, headers=headers)
         except Exception as e:
             return Response({'success': False, 'message': "error retrieving department form structure",
                              'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
             
+@query_budget(post=10)
 class EmployeeCreateView(APIView):
     def post(self, request):
         serializer = EmployeeCreateSerializer(data=request.data)
@@ -117,6 +153,128 @@ class EmployeeCreateView(APIView):
                     'created_at': employee.created_at }}, status=status.HTTP_201_CREATED)
         return Response({ 'success': False, 'errors': serializer.errors }, status=status.HTTP_400_BAD_REQUEST)
             
+@query_budget(post=11)
+class EmployeeImportView(APIView):
+    def post(self, request, id):
+        department = get_object_or_404(Department, id=id, created_by=request.user)
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'success': False, 'message': 'file is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            batch_size = min(int(request.query_params.get('batch_size', 1000)), 5000)
+        except ValueError:
+            return Response({'success': False, 'message': 'batch_size must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        if batch_size < 1:
+            return Response({'success': False, 'message': 'batch_size must be at least 1'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            file_format = request.query_params.get('file_format') or detect_format(upload.name, upload.content_type or '')
+            result = EmployeeImporter(department, batch_size=batch_size).run(upload, file_format)
+        except ImportFormatError as e:
+            return Response({'success': False, 'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({'success': result['failed'] == 0, 'data': result}, status=status.HTTP_200_OK)
+            
+@query_budget(get=3)
+class EmployeeExportView(APIView):
+    def get(self, request, id):
+        department = get_object_or_404(Department, id=id, created_by=request.user)
+        file_format = request.query_params.get('file_format', 'csv')
+        if file_format not in EXPORT_FORMATS:
+            return Response({'success': False, 'message': f'file_format must be one of {EXPORT_FORMATS}'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            fields = select_fields(department, request.query_params.get('columns'))
+        except ExportColumnError as e:
+            return Response({'success': False, 'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = Employee.objects.filter(department=department)
+        filterset = EmployeeFilter(data=request.GET, queryset=queryset, request=request)
+        filterset.request.parser_context = {'kwargs': {'id': id}}
+        if not filterset.is_valid():
+            return Response({'success': False, 'message': 'Invalid filter parameters', 'error': filterset.errors},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            filtered_queryset = filterset.qs
+        except EmployeeQueryError as e:
+            return Response({'success': False, 'message': 'Invalid filter parameters', 'error': str(e)},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        content_type = 'text/csv' if file_format == 'csv' else 'application/x-ndjson'
+        response = StreamingHttpResponse(iter_export(filtered_queryset, fields, file_format), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="department-{department.id}-employees.{file_format}"'
+        return response
+            
+@query_budget(get=4)
+class EmployeeAnalyticsView(APIView):
+    def get(self, request, id):
+        department = get_object_or_404(Department, id=id, created_by=request.user)
+        try:
+            employees = filter_employees(request, id, Employee.objects.filter(department=department))
+            histogram = request.query_params.get('histogram')
+            if histogram:
+                if not histogram.isdigit():
+                    raise EmployeeQueryError('histogram must be a date field id')
+                field = get_object_or_404(DynamicField, id=histogram, department=department, field_type='date')
+                interval = request.query_params.get('interval', 'month')
+                key = analytics_cache_key(department, 'histogram', request)
+                data = cached(key, request, partial(date_histogram, employees, field, interval))
+            else:
+                fields = DynamicField.objects.filter(department=department, field_type__in=('number', 'date')).order_by('order', 'id')
+                requested = request.query_params.get('fields')
+                if requested:
+                    fields = fields.filter(id__in=[f for f in requested.split(',') if f.isdigit()])
+                percentiles = parse_percentiles(request.query_params.get('percentiles'))
+                key = analytics_cache_key(department, 'summary', request)
+                data = cached(key, request, partial(field_summary, employees, list(fields), percentiles))
+        except EmployeeQueryError as e:
+            return Response({'success': False, 'message': 'Invalid analytics parameters', 'error': str(e)},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({'success': True, 'data': data}, status=status.HTTP_200_OK)
+
+@query_budget(get=4)
+class EmployeeFacetsView(APIView):
+    def get(self, request, id):
+        department = get_object_or_404(Department, id=id, created_by=request.user)
+        fields = DynamicField.objects.filter(department=department, field_type__in=FACET_TYPES).order_by('order', 'id')
+        try:
+            employees = filter_employees(request, id, Employee.objects.filter(department=department))
+            key = analytics_cache_key(department, 'facets', request)
+            data = cached(key, request, partial(field_facets, employees, list(fields)))
+        except EmployeeQueryError as e:
+            return Response({'success': False, 'message': 'Invalid filter parameters', 'error': str(e)},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({'success': True, 'data': data}, status=status.HTTP_200_OK)
+
+@query_budget(get=4)
+class HeadcountSeriesView(APIView):
+    def get(self, request, id):
+        department = get_object_or_404(Department, id=id, created_by=request.user)
+        period = request.query_params.get('period', 'month')
+        if period not in PERIODS:
+            return Response({'success': False, 'message': f'period must be one of {PERIODS}'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        bounds = {}
+        for key in ('start', 'end'):
+            raw = request.query_params.get(key)
+            try:
+                bounds[key] = parse_date(raw) if raw else None
+            except ValueError:
+                bounds[key] = None
+            if raw and bounds[key] is None:
+                return Response({'success': False, 'message': f'{key} must be a YYYY-MM-DD date'},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+        start, end = bounds['start'], bounds['end']
+
+        return Response({'success': True, 'data': headcount_series(department, period, start, end)},
+                        status=status.HTTP_200_OK)
+
+@query_budget(get=3)
 class EmployeeDetailView(APIView):
     def get(self, request, employee_id):
         employee = get_object_or_404(Employee, id=employee_id)
@@ -124,10 +282,11 @@ class EmployeeDetailView(APIView):
         return Response({ 'success': True,
             'data': serializer.data }, status=status.HTTP_200_OK)
         
+@query_budget(get=7, put=14, delete=8)
 class EmployeeListView(APIView):
     def get(self, request, id):
         department = get_object_or_404(Department, id=id)
-        queryset = Employee.objects.filter(department=department).order_by('id')
+        queryset = Employee.objects.filter(department=department).defer('search_document', 'search_vector').order_by('id')
 
         filterset = EmployeeFilter(
             data=request.GET,
@@ -143,9 +302,17 @@ class EmployeeListView(APIView):
                 'error': filterset.errors
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        filtered_queryset = filterset.qs
+        paginator = get_employee_paginator(request)
+        if isinstance(paginator, EmployeeCursorPagination) and request.GET.get('ordering'):
+            return Response({'success': False, 'message': 'ordering is not supported with cursor pagination'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            filtered_queryset = filterset.qs
+        except EmployeeQueryError as e:
+            return Response({'success': False, 'message': 'Invalid filter parameters', 'error': str(e)},
+                            status=status.HTTP_400_BAD_REQUEST)
 
-        paginator = defaultPagination()
         paginated_data = paginator.paginate_queryset(filtered_queryset, request)
         serializer = EmployeeSerializer(paginated_data, many=True)
 
@@ -162,51 +329,41 @@ class EmployeeListView(APIView):
                 'data': {
                     'id': employee.id,
                     'department': employee.department.id,
-                    'created_at': employee.created_at}}, status=status.HTTP_200_OK)
+                    'created_at': employee.created_at,
+                    'changed': serializer.changed_count}}, status=status.HTTP_200_OK)
         return Response({'success': False,
             'error': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
         
     def delete(self, request, id):
         employee = get_object_or_404(Employee, id=id)
         try:
-            employee.delete()
+            with transaction.atomic():
+                employee.delete()
+                record_employees(employee.department_id, -1)
             return Response({'success': True,
                 'message': 'Employee deleted successfully' }, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({ 'success': False,
                 'error': f'Failed to delete employee: {str(e)}'}, status=status.HTTP_400_BAD_REQUEST)
 
+@query_budget(put=13)
 class DynamicFieldUpdate(APIView):
 
     def put(self, request, id):
         try:
             department = Department.objects.get(id=id)
-            
-            existing_field_ids = set(DynamicField.objects.filter(department_id=id).values_list('id', flat=True))
-            submitted_field_ids = set(field_data.get('id') for field_data in request.data.get('fields', []) if field_data.get('id'))
-            
-            fields_to_delete = existing_field_ids - submitted_field_ids
-            DynamicField.objects.filter(id__in=fields_to_delete).delete()
-
-            for field_data in request.data.get('fields', []):
-                field_data['department'] = id
-                field_id = field_data.get('id')
-                
-                if field_id and DynamicField.objects.filter(id=field_id, department_id=id).exists():
-                    field = DynamicField.objects.get(id=field_id, department_id=id)
-                    serializer = DynamicFieldSerializer(field, data=field_data, partial=True)
-                else:
-                    if 'id' in field_data:
-                        del field_data['id']
-                    serializer = DynamicFieldSerializer(data=field_data)
-
-                if serializer.is_valid():
-                    serializer.save()
-                else:
-                    return Response({"success": False, "message": "Form update failed", "error": serializer.errors},
-                        status=status.HTTP_400_BAD_REQUEST)
 
-            return Response( {"success": True, "message": "Form updated successfully"},
+            serializer = DynamicFieldInputSerializer(data=request.data.get('fields', []), many=True)
+            if not serializer.is_valid():
+                return Response({"success": False, "message": "Form update failed", "error": serializer.errors},
+                    status=status.HTTP_400_BAD_REQUEST)
+            try:
+                diff = apply_field_diff(diff_fields(department, serializer.validated_data, delete_missing=True))
+            except SchemaDiffError as e:
+                return Response({"success": False, "message": "Form update failed", "error": str(e)},
+                    status=status.HTTP_400_BAD_REQUEST)
+
+            return Response( {"success": True, "message": "Form updated successfully", "diff": diff},
                 status=status.HTTP_200_OK )
 
         except Department.DoesNotExist:
@@ -215,11 +372,11 @@ class DynamicFieldUpdate(APIView):
             return Response({"success": False, "message": "Form update failed", "error": str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR )
             
+@query_budget(get=2)
 class DepartmentsNoForm(APIView):
     def get(self, request):
         try:
-            departments = Department.objects.filter(fields__isnull=True, created_by=request.user).distinct()
-            print(departments)
+            departments = Department.objects.filter(has_form=False, created_by=request.user)
             serializer = DepartmentsNoFormSerializer(departments, many=True)
             return Response({'success': True, 'data': serializer.data}, status=status.HTTP_200_OK)
         except Exception as e:
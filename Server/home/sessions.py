@@ -0,0 +1,133 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.contrib.sessions.backends import cached_db, signed_cookies
+from django.contrib.sessions.models import Session
+from django.core.cache import caches
+from django.db import connection
+from django.utils import timezone
+
+_local_sessions = OrderedDict()
+_local_lock = threading.Lock()
+
+
+def _setting(name, default):
+    return getattr(settings, 'SESSION_STORE_OPTIONS', {}).get(name, default)
+
+
+def _revocation_key(session_key):
+    return 'home:sessions:revoked:' + hashlib.sha256(session_key.encode()).hexdigest()
+
+
+def _local_get(session_key):
+    with _local_lock:
+        entry = _local_sessions.get(session_key)
+        if entry is None:
+            return None
+        if entry[1] <= time.monotonic():
+            del _local_sessions[session_key]
+            return None
+        _local_sessions.move_to_end(session_key)
+        return dict(entry[0])
+
+
+def _local_set(session_key, data):
+    with _local_lock:
+        _local_sessions[session_key] = (dict(data), time.monotonic() + _setting('LOCAL_TTL', 5))
+        _local_sessions.move_to_end(session_key)
+        while len(_local_sessions) > _setting('LOCAL_MAX_SIZE', 2048):
+            _local_sessions.popitem(last=False)
+
+
+def _local_delete(session_key):
+    with _local_lock:
+        _local_sessions.pop(session_key, None)
+
+
+def clear_local_sessions():
+    with _local_lock:
+        _local_sessions.clear()
+
+
+def clear_expired_batched(batch_size=None, pause=None):
+    batch_size = batch_size or _setting('CLEANUP_BATCH_SIZE', 1000)
+    pause = _setting('CLEANUP_PAUSE', 0.05) if pause is None else pause
+    removed = 0
+    while True:
+        keys = list(Session.objects.filter(expire_date__lt=timezone.now())
+                    .values_list('session_key', flat=True)[:batch_size])
+        if not keys:
+            return removed
+        removed += Session.objects.filter(session_key__in=keys).delete()[0]
+        # Short pauses keep each DELETE from holding locks against logins for long.
+        time.sleep(pause)
+
+
+def _cleanup_in_background():
+    try:
+        clear_expired_batched()
+    finally:
+        connection.close()
+
+
+def schedule_cleanup():
+    if not _setting('CLEANUP_ON_LOGIN', True):
+        return
+    # add() doubles as a cross-process lock so only one worker sweeps per interval.
+    if caches[settings.SESSION_CACHE_ALIAS].add('home:sessions:cleanup', 1, _setting('CLEANUP_INTERVAL', 60 * 60)):
+        threading.Thread(target=_cleanup_in_background, name='session-cleanup', daemon=True).start()
+
+
+class SessionStore(cached_db.SessionStore):
+    def load(self):
+        if self.session_key is not None:
+            data = _local_get(self.session_key)
+            # Another worker may have deleted the session since this copy was cached.
+            if data is not None and not self._cache.get(_revocation_key(self.session_key)):
+                return data
+            if data is not None:
+                _local_delete(self.session_key)
+        data = super().load()
+        if self.session_key is not None and data:
+            _local_set(self.session_key, data)
+        return data
+
+    def save(self, must_create=False):
+        super().save(must_create)
+        _local_set(self.session_key, self._session)
+
+    def delete(self, session_key=None):
+        key = session_key or self.session_key
+        if key:
+            # Local copies elsewhere expire within LOCAL_TTL, so the marker only has to outlive them.
+            self._cache.set(_revocation_key(key), 1, _setting('LOCAL_TTL', 5))
+        _local_delete(key)
+        super().delete(session_key)
+
+    @classmethod
+    def clear_expired(cls):
+        clear_expired_batched()
+
+
+class SignedCookieSessionStore(signed_cookies.SessionStore):
+    @classmethod
+    def revoke(cls, session_key):
+        if session_key:
+            caches[settings.SESSION_CACHE_ALIAS].set(_revocation_key(session_key), 1, settings.SESSION_COOKIE_AGE)
+
+    def load(self):
+        if self.session_key and caches[settings.SESSION_CACHE_ALIAS].get(_revocation_key(self.session_key)):
+            self.create()
+            return {}
+        return super().load()
+
+    def cycle_key(self):
+        old_key = self.session_key
+        super().cycle_key()
+        self.revoke(old_key)
+
+    def delete(self, session_key=None):
+        self.revoke(session_key or self.session_key)
+        super().delete(session_key)
@@ -0,0 +1,10 @@
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_in
+from django.dispatch import receiver
+from .sessions import schedule_cleanup
+
+
+@receiver(user_logged_in)
+def sweep_expired_sessions(sender, request, user, **kwargs):
+    if settings.SESSION_ENGINE == 'home.sessions':
+        schedule_cleanup()
@@ -0,0 +1 @@
+from .sessions import SignedCookieSessionStore as SessionStore
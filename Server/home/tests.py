@@ -1,3 +1,54 @@
-from django.test import TestCase
+from unittest import mock
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from .sessions import SessionStore, _local_get, _local_set, clear_local_sessions
 
-# Create your tests here.
+User = get_user_model()
+
+
+class SessionCleanupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='sessions', email='sessions@example.com', password='Sessions-pass1')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_login_does_not_sweep_under_the_test_runner(self):
+        with mock.patch('home.sessions.threading.Thread') as thread:
+            self.client.force_login(self.user)
+        thread.assert_not_called()
+
+    def test_login_sweeps_once_per_interval(self):
+        options = {**settings.SESSION_STORE_OPTIONS, 'CLEANUP_ON_LOGIN': True}
+        with override_settings(SESSION_STORE_OPTIONS=options), mock.patch('home.sessions.threading.Thread') as thread:
+            self.client.force_login(self.user)
+            self.client.force_login(self.user)
+        thread.assert_called_once()
+        thread.return_value.start.assert_called_once()
+
+
+class LocalSessionTierTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        clear_local_sessions()
+        self.store = SessionStore()
+        self.store['user'] = 'cached'
+        self.store.save()
+
+    def test_load_is_served_from_the_local_tier(self):
+        SessionStore(self.store.session_key).load()
+        with self.assertNumQueries(0):
+            self.assertEqual(SessionStore(self.store.session_key).load(), {'user': 'cached'})
+
+    def test_session_deleted_on_another_worker_is_not_served(self):
+        session_key = self.store.session_key
+        data = SessionStore(session_key).load()
+        SessionStore(session_key).delete()
+        # This worker still holds the copy it loaded before the other worker's logout.
+        _local_set(session_key, data)
+
+        self.assertEqual(SessionStore(session_key).load(), {})
+        self.assertIsNone(_local_get(session_key))
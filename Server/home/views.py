@@ -1,4 +1,5 @@
-from django.shortcuts import render, redirect
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
 from django.contrib.auth import authenticate, login, logout
 from django.http import JsonResponse
 from django.views import View
@@ -15,20 +16,20 @@ User = get_user_model()
 
 class HomeView(View):
     def get(self, request):
-        return render(request, 'home.html')
+        return TemplateResponse(request, 'home.html')
 
 class SignInView(View):
     def get(self, request):
-        return render(request, 'signin.html')
+        return TemplateResponse(request, 'signin.html')
 
 class SignUpView(View):
     def get(self, request):
-        return render(request, 'signup.html')
+        return TemplateResponse(request, 'signup.html')
 
 class DashboardView(View):
     @method_decorator(login_required)
     def get(self, request):
-        return render(request, 'dashboard.html')
+        return TemplateResponse(request, 'dashboard.html')
 
 @method_decorator(csrf_exempt, name='dispatch')
 class LoginView(View):
@@ -98,15 +99,15 @@ def ProfileView(request):
 
         if not check_password(old_password, request.user.password):
             messages.error(request, 'Current password is incorrect!')
-            return render(request, 'profile.html')
+            return TemplateResponse(request, 'profile.html')
 
         if new_password1 != new_password2:
             messages.error(request, 'New passwords do not match!')
-            return render(request, 'profile.html')
+            return TemplateResponse(request, 'profile.html')
 
         if len(new_password1) < 8:
             messages.error(request, 'New password must be at least 8 characters long!')
-            return render(request, 'profile.html')
+            return TemplateResponse(request, 'profile.html')
 
         request.user.set_password(new_password1)
         request.user.save()
@@ -114,4 +115,4 @@ def ProfileView(request):
         messages.success(request, 'Your password was successfully updated!')
         return redirect('profile')
 
-    return render(request, 'profile.html')
\ No newline at end of file
+    return TemplateResponse(request, 'profile.html')
\ No newline at end of file